@@ -2,13 +2,26 @@ from flask import Flask
 from flask_restful import Api
 from flask_migrate import Migrate
 from flasgger import Swagger
-from app.resources.user import Users, user
-from app.resources.teacher import Teachers, Teacher
-from app.resources.student import Students, Student
-from app.resources.course import Courses, Course
-from app.resources.enrollment import Enrollments, Enrollment
-from app.resources.fee import Fees, Fee
-from app.extension import db
+from app.resources.user import Users, user, Login, Logout
+from app.resources.teacher import Teachers, TeachersBulk, TeachersWorkload, Teacher
+from app.resources.student import Students, StudentsBulk, CourseStudents, Student
+from app.resources.course import Courses, CoursesBulk, TeacherCourses, CourseRoster, Course
+from app.resources.enrollment import Enrollments, Enrollment, CourseEnrollmentsBulk, StudentEnrollments, StudentTranscript
+from app.resources.fee import Fees, FeesBulk, FeesImport, StudentFees, StudentBalance, Fee
+from app.resources.cache import CacheStats
+from app.resources.batch import Batch
+from app.resources.stats import Stats
+from app.resources.search import Search
+from app.extension import db, compress
+from app.cache import entity_cache
+from app.passwords import passwords
+from app.auth import tokens
+from app.balances import balances_cli
+from app.workloads import workload_cli
+from app.stats import stats
+from app.search import search_cli, include_name
+from app.representations import output_json
+from app.streaming import NDJSON, output_ndjson
 from config import Config
 
 #swagger configuration
@@ -43,6 +56,14 @@ template = {
 "host": "localhost:5000",
 "basePath": "/api",
 "schemes": ["http", "https"],
+"securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "Bearer <token>, as returned by /api/login"
+        }
+    },
 "tags": [
         {
             "name": "Users",
@@ -67,6 +88,22 @@ template = {
         {
             "name": "Fees",
             "description": "Operations related to fees"
+        },
+        {
+            "name": "Cache",
+            "description": "Operations related to the entity cache"
+        },
+        {
+            "name": "Batch",
+            "description": "Several API requests in one round trip"
+        },
+        {
+            "name": "Stats",
+            "description": "Headline numbers for the admin dashboard"
+        },
+        {
+            "name": "Search",
+            "description": "Full-text search over students, teachers and courses"
         }
     ]
 }
@@ -74,8 +111,18 @@ template = {
 app = Flask(__name__)
 app.config.from_object(Config)
 db.init_app(app)
+compress.init_app(app)
+entity_cache.init_app(app)
+passwords.init_app(app)
+tokens.init_app(app)
+stats.init_app(app)
+app.cli.add_command(balances_cli)
+app.cli.add_command(workload_cli)
+app.cli.add_command(search_cli)
 api = Api(app)
-migrate = Migrate(app, db)
+api.representation('application/json')(output_json)
+api.representation(NDJSON)(output_ndjson)
+migrate = Migrate(app, db, include_name=include_name)
 swagger = Swagger(app, config=swagger_config, template=template)
 
 
@@ -85,22 +132,46 @@ swagger = Swagger(app, config=swagger_config, template=template)
 # Api endpoints
 api.add_resource(Users, '/api/users')
 api.add_resource(user, '/api/users/<int:id>')
+api.add_resource(Login, '/api/login')
+api.add_resource(Logout, '/api/logout')
 
 api.add_resource(Teachers, '/api/teachers')
+api.add_resource(TeachersBulk, '/api/teachers/bulk')
+api.add_resource(TeachersWorkload, '/api/teachers/workload')
 api.add_resource(Teacher, '/api/teachers/<int:id>')
+api.add_resource(TeacherCourses, '/api/teachers/<int:id>/courses')
 
 api.add_resource(Students, '/api/students')
+api.add_resource(StudentsBulk, '/api/students/bulk')
 api.add_resource(Student, '/api/students/<int:id>')
+api.add_resource(StudentEnrollments, '/api/students/<int:id>/enrollments')
+api.add_resource(StudentFees, '/api/students/<int:id>/fees')
+api.add_resource(StudentTranscript, '/api/students/<int:id>/transcript')
+api.add_resource(StudentBalance, '/api/students/<int:id>/balance')
 
 api.add_resource(Courses, '/api/courses')
+api.add_resource(CoursesBulk, '/api/courses/bulk')
 api.add_resource(Course, '/api/courses/<int:id>')
+api.add_resource(CourseStudents, '/api/courses/<int:id>/students')
+api.add_resource(CourseRoster, '/api/courses/<int:id>/roster')
+api.add_resource(CourseEnrollmentsBulk, '/api/courses/<int:id>/enrollments:bulk')
 
 api.add_resource(Enrollments, '/api/enrollments')
 api.add_resource(Enrollment, '/api/enrollments/<int:id>')
 
 api.add_resource(Fees, '/api/fees')
+api.add_resource(FeesBulk, '/api/fees/bulk')
+api.add_resource(FeesImport, '/api/fees/import')
 api.add_resource(Fee, '/api/fees/<int:id>')
 
+api.add_resource(CacheStats, '/api/cache')
+
+api.add_resource(Batch, '/api/batch')
+
+api.add_resource(Stats, '/api/stats')
+
+api.add_resource(Search, '/api/search')
+
 
 
 
@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_restful import abort
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from app.extension import db
+from app.models.revoked_token import RevokedTokenModel
+
+
+class TokenAuth(object):
+    """Signed, time limited bearer tokens checked without touching the database.
+
+    A token carries the user's id, roles and a random jti, signed with
+    SECRET_KEY. Verified tokens are kept in an LRU of TOKEN_CACHE_SIZE
+    entries so repeated requests skip the HMAC. Revocation goes through
+    the revoked_tokens table, which is mirrored in memory as a set of the
+    jtis that have not expired yet and reloaded at most every
+    TOKEN_DENYLIST_REFRESH seconds, so other processes see a logout within
+    that interval.
+    """
+    salt = 'access-token'
+
+    def __init__(self, app=None):
+        self._verified = OrderedDict()
+        self._denied = set()
+        self._denied_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TOKEN_MAX_AGE', 3600)
+        app.config.setdefault('TOKEN_CACHE_SIZE', 4096)
+        app.config.setdefault('TOKEN_DENYLIST_REFRESH', 30)
+
+    def _serializer(self):
+        if not current_app.secret_key:
+            raise RuntimeError('SECRET_KEY must be set to issue or verify tokens.')
+        return URLSafeTimedSerializer(current_app.secret_key, salt=self.salt)
+
+    def issue(self, user):
+        """A new token for user."""
+        claims = {'uid': user.id, 'roles': user.roles.split(','), 'jti': uuid.uuid4().hex}
+        return self._serializer().dumps(claims)
+
+    def verify(self, token):
+        """The claims of token, or None when it is invalid, expired or revoked."""
+        with self._lock:
+            entry = self._verified.get(token)
+            if entry is not None:
+                self._verified.move_to_end(token)
+        if entry is None:
+            max_age = current_app.config['TOKEN_MAX_AGE']
+            try:
+                claims, signed_at = self._serializer().loads(token, max_age=max_age, return_timestamp=True)
+            except (BadSignature, SignatureExpired):
+                return None
+            entry = (claims, signed_at.timestamp() + max_age)
+            with self._lock:
+                self._verified[token] = entry
+                while len(self._verified) > current_app.config['TOKEN_CACHE_SIZE']:
+                    self._verified.popitem(last=False)
+        claims, expires_at = entry
+        if expires_at <= time.time() or claims['jti'] in self.denied():
+            return None
+        return claims
+
+    def revoke(self, claims):
+        """Deny-list the token with these claims until it would have expired."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        expires_at = now + timedelta(seconds=current_app.config['TOKEN_MAX_AGE'])
+        RevokedTokenModel.query.filter(RevokedTokenModel.expires_at <= now).delete()
+        db.session.merge(RevokedTokenModel(jti=claims['jti'], expires_at=expires_at))
+        db.session.commit()
+        with self._lock:
+            self._denied.add(claims['jti'])
+
+    def denied(self):
+        """The jtis of revoked tokens that have not expired yet."""
+        refresh = current_app.config['TOKEN_DENYLIST_REFRESH']
+        if self._denied_at is None or time.monotonic() - self._denied_at >= refresh:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            denied = set(db.session.scalars(
+                db.select(RevokedTokenModel.jti).where(RevokedTokenModel.expires_at > now)))
+            with self._lock:
+                self._denied, self._denied_at = denied, time.monotonic()
+        return self._denied
+
+
+tokens = TokenAuth()
+
+
+def bearer_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else None
+
+
+def token_required(*roles):
+    """Require a valid bearer token, holding one of roles if any are given.
+
+    The token's claims are available as g.token in the wrapped method.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            token = bearer_token()
+            claims = tokens.verify(token) if token else None
+            if claims is None:
+                abort(401, message='A valid bearer token is required.')
+            if roles and not set(roles) & set(claims['roles']):
+                abort(403, message='You do not have permission to do that.')
+            g.token = claims
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
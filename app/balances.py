@@ -0,0 +1,83 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, insert, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extension import db
+from app.models.fee import FeeModel
+from app.models.fee_balance import FeeBalanceModel
+from app.summaries import maintain
+
+
+balances_cli = AppGroup('balances', help='Fee balance summary commands.')
+
+balances = FeeBalanceModel.__table__
+# summed columns, in the order deltas carry them
+TOTALS = ('fee_count', 'billed', 'paid', 'pending', 'overdue')
+
+
+def _contribution(deltas, student_id, semester, amount, status, sign):
+    """Add (or with sign -1 take away) one fee's share of its balance row."""
+    status = 'pending' if status is None else status
+    key = (student_id, semester or '')
+    totals = deltas.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0])
+    totals[0] += sign
+    totals[1] += sign * amount
+    if status in TOTALS[2:]:
+        totals[TOTALS.index(status)] += sign * amount
+
+
+def apply(connection, deltas):
+    """Add deltas, a dict of (student_id, semester) -> totals, to fee_balances."""
+    rows = [dict(zip(('student_id', 'semester') + TOTALS, key + tuple(totals)))
+            for key, totals in sorted(deltas.items()) if any(totals)]
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # one executemany upsert for the whole flush
+        module = sqlite if dialect == 'sqlite' else postgresql
+        statement = module.insert(balances)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['student_id', 'semester'],
+            set_={name: balances.c[name] + statement.excluded[name] for name in TOTALS}), rows)
+    else:
+        for row in rows:
+            updated = connection.execute(
+                update(balances)
+                .where(balances.c.student_id == row['student_id'], balances.c.semester == row['semester'])
+                .values({name: balances.c[name] + row[name] for name in TOTALS})
+            ).rowcount
+            if not updated:
+                connection.execute(insert(balances).values(row))
+    # a row whose last fee went away goes with it
+    connection.execute(delete(balances).where(
+        tuple_(balances.c.student_id, balances.c.semester).in_([(r['student_id'], r['semester']) for r in rows]),
+        balances.c.fee_count <= 0))
+
+
+def rebuild(connection):
+    """Recompute fee_balances from the fees table in one INSERT .. SELECT."""
+    semester = func.coalesce(FeeModel.semester, '')
+    # a NULL status reads as pending, as it does for the flush hook
+    status = func.coalesce(FeeModel.status, 'pending')
+    connection.execute(delete(balances))
+    connection.execute(insert(balances).from_select(
+        ['student_id', 'semester'] + list(TOTALS),
+        db.select(
+            FeeModel.student_id, semester, func.count(), func.sum(FeeModel.amount),
+            *[func.sum(case((status == name, FeeModel.amount), else_=0)) for name in TOTALS[2:]],
+        ).group_by(FeeModel.student_id, semester)))
+    return connection.execute(db.select(func.count()).select_from(balances)).scalar()
+
+
+maintain(FeeModel, ('student_id', 'semester', 'amount', 'status'), _contribution,
+         lambda session, deltas: apply(session.connection(), deltas),
+         lambda session: rebuild(session.connection()))
+
+
+@balances_cli.command('rebuild')
+def rebuild_command():
+    """Recompute every fee balance from the fees table."""
+    with db.engine.begin() as connection:
+        count = rebuild(connection)
+    click.echo(f'Rebuilt {count} fee balances.')
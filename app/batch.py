@@ -0,0 +1,92 @@
+import json
+
+from flask import current_app, request
+from werkzeug.datastructures import Headers, MIMEAccept
+from werkzeug.http import parse_accept_header
+from werkzeug.test import EnvironBuilder
+from app.extension import db
+
+
+# Response headers that describe the HTTP envelope rather than the resource
+_ENVELOPE_HEADERS = {'Content-Length', 'Content-Type', 'Content-Encoding', 'Vary'}
+
+
+def dispatch(method, path, body=None, headers=None):
+    """Run one request through the app's own routing and resources, without
+    going back out over HTTP, and return its status, headers and body."""
+    builder = EnvironBuilder(path=path, method=method, json=body, headers=headers,
+                             base_url=request.url_root)
+    with current_app.request_context(builder.get_environ()):
+        try:
+            response = current_app.full_dispatch_request()
+        except Exception:
+            current_app.logger.exception('Batch request %s %s failed', method, path)
+            return {'status': 500, 'headers': {}, 'body': {'message': 'Internal Server Error'}}
+        try:
+            data = response.get_data()
+            body = json.loads(data) if data and response.is_json else None
+        except Exception:
+            current_app.logger.exception('Batch request %s %s returned an undecodable body', method, path)
+            return {'status': 500, 'headers': {}, 'body': {'message': 'Internal Server Error'}}
+        finally:
+            response.close()
+    return {
+        'status': response.status_code,
+        'headers': {k: v for k, v in response.headers.items() if k not in _ENVELOPE_HEADERS},
+        'body': body,
+    }
+
+
+def run_batch(requests, atomic=False):
+    """Dispatch each of requests in order; returns (responses, committed).
+
+    Sub-requests share this request's session. Normally each one commits on
+    its own and a failed one is rolled back before the next runs. With
+    atomic, commits made by the resources only flush, the batch stops at the
+    first response with a status of 400 or more, and everything is then
+    committed or rolled back as one transaction.
+    """
+    session = db.session()
+    responses = []
+    if atomic:
+        session.commit = session.flush
+    try:
+        for sub in requests:
+            response = _not_acceptable(sub) or dispatch(sub['method'], sub['path'], sub.get('body'), _headers(sub))
+            responses.append(response)
+            if response['status'] >= 400:
+                if atomic:
+                    break
+                session.rollback()
+    finally:
+        if atomic:
+            del session.commit
+
+    if not atomic:
+        return responses, True
+    if responses[-1]['status'] >= 400:
+        session.rollback()
+        return responses, False
+    session.commit()
+    return responses, True
+
+
+def _not_acceptable(sub):
+    """A 406 response for a sub-request whose Accept header rules out JSON,
+    the only body a batch can carry, and None otherwise."""
+    for key, value in (sub.get('headers') or {}).items():
+        if key.lower() == 'accept' and parse_accept_header(value, MIMEAccept).best_match(['application/json']) is None:
+            return {'status': 406, 'headers': {}, 'body': {'message': 'Batch sub-requests can only return application/json.'}}
+    return None
+
+
+def _headers(sub):
+    # sub-requests act for the same client, but always get plain JSON back
+    headers = Headers()
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+    for key, value in (sub.get('headers') or {}).items():
+        headers[key] = value
+    headers['Accept'] = 'application/json'
+    headers['Accept-Encoding'] = 'identity'
+    return headers
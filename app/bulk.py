@@ -0,0 +1,185 @@
+import csv
+from copy import copy
+
+from flask import current_app, request
+from flask_restful import abort
+from sqlalchemy import insert
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from app.extension import db
+
+
+class ItemRequest(object):
+    """Just enough of flask.request for RequestParser.parse_args to read one
+    item of a bulk payload as if it had been POSTed on its own."""
+    def __init__(self, item):
+        self.json = item
+        self.values = MultiDict()
+        self.unparsed_arguments = {}
+
+
+def bulk_create(model, parser, unique=(), references=None):
+    """Validate the JSON array in the request body and insert it in one go.
+
+    Every item is parsed with the same parser the single item POST uses,
+    then unique columns and foreign keys are checked with one IN query per
+    column for the whole batch. Nothing is written unless every item is
+    valid; otherwise the response is a 400 listing the errors by index.
+    Valid batches go out as a single executemany INSERT .. RETURNING, which
+    SQLAlchemy splits into multi-row statements of BULK_PAGE_SIZE rows, and
+    one commit.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        abort(400, message='Request body must be a non-empty JSON array.')
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        abort(413, message=f"At most {current_app.config['BULK_MAX_ITEMS']} items can be created at once.")
+
+    rows, errors = _parse(parser, dict(enumerate(items)))
+    for name in unique:
+        _check_unique(model, name, rows, errors)
+    for name, target in (references or {}).items():
+        _check_references(target, name, rows, errors)
+    if errors:
+        abort(400, message=f'{len(errors)} of {len(items)} items are invalid, nothing was created.',
+              errors=[{'index': index, 'message': errors[index]} for index in sorted(errors)])
+
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    ids = db.session.scalars(
+        statement, list(rows.values()),
+        execution_options={'insertmanyvalues_page_size': current_app.config['BULK_PAGE_SIZE']},
+    ).all()
+    db.session.commit()
+    return [{'index': index, 'id': id} for index, id in zip(rows, ids)]
+
+
+def import_csv(model, parser, stream, references=None):
+    """Insert the rows of a CSV file read from stream, one batch at a time.
+
+    The file is read incrementally with csv.DictReader, CSV_IMPORT_BATCH_SIZE
+    rows at a time, so memory stays bounded by the batch size rather than
+    the file size. Each batch is parsed with parser as if every row had been
+    POSTed on its own (empty cells count as missing), its foreign keys are
+    checked with one IN query, and its valid rows are inserted and committed
+    in their own transaction. Invalid rows are skipped and reported by line
+    number, up to CSV_IMPORT_MAX_ERRORS of them. A line that is not UTF-8
+    or not CSV stops the import with a 400 naming it and the number of rows
+    already committed; its batch is not inserted.
+    """
+    config = current_app.config
+    reader = csv.DictReader(_lines(stream))
+    imported = failed = 0
+    report = []
+    try:
+        missing = [arg.name for arg in parser.args if arg.required and arg.name not in (reader.fieldnames or ())]
+        if missing:
+            abort(400, message=f"Missing CSV columns: {', '.join(missing)}.")
+
+        for batch in _batches(reader, config['CSV_IMPORT_BATCH_SIZE']):
+            rows, errors = _parse(parser, batch)
+            for name, target in (references or {}).items():
+                _check_references(target, name, rows, errors)
+            for line in errors:
+                rows.pop(line, None)
+            if rows:
+                db.session.execute(insert(model), list(rows.values()))
+                db.session.commit()
+            imported += len(rows)
+            failed += len(errors)
+            room = config['CSV_IMPORT_MAX_ERRORS'] - len(report)
+            report += [{'line': line, 'message': errors[line]} for line in sorted(errors)[:max(room, 0)]]
+    except (UnicodeDecodeError, csv.Error) as e:
+        # raised before the reader counts the line it failed on
+        reason = 'is not valid UTF-8' if isinstance(e, UnicodeDecodeError) else f'is not valid CSV ({e})'
+        _unreadable(reader.line_num + 1, reason, imported)
+    return {'imported': imported, 'failed': failed, 'errors': report, 'errors_truncated': failed > len(report)}
+
+
+def _lines(stream):
+    """Decode a binary stream one line at a time, so that a decoding error
+    belongs to a known line rather than to a buffered chunk."""
+    encoding = 'utf-8-sig'
+    for line in stream:
+        yield line.decode(encoding)
+        encoding = 'utf-8'
+
+
+def _unreadable(line, reason, imported):
+    abort(400, message=f'Line {line} {reason}; {imported} rows before it were already imported.',
+          line=line, imported=imported)
+
+
+def _batches(reader, size):
+    """Yield dicts of up to size rows from a DictReader, keyed by line number."""
+    batch = {}
+    for row in reader:
+        # reader.line_num is the line the row ended on, quoted newlines included
+        batch[reader.line_num] = {key: value for key, value in row.items()
+                                  if key is not None and value not in (None, '')}
+        if len(batch) >= size:
+            yield batch
+            batch = {}
+    if batch:
+        yield batch
+
+
+def _parse(parser, items):
+    # a shallow copy: RequestParser.copy deep copies the arguments, which
+    # fails on types that are modules
+    parser = copy(parser)
+    parser.bundle_errors = True
+    rows, errors = {}, {}
+    for index, item in items.items():
+        if not isinstance(item, dict):
+            errors[index] = 'Item must be a JSON object.'
+            continue
+        try:
+            row = dict(parser.parse_args(req=ItemRequest(item)))
+        except HTTPException as e:
+            errors[index] = getattr(e, 'data', {}).get('message', e.description)
+            continue
+        # bundled parsing only collects ValueErrors, any other converter
+        # failure is left behind as the argument's value
+        failed = {arg.name: arg.help.format(error_msg=row[arg.dest or arg.name]) if arg.help
+                  else str(row[arg.dest or arg.name])
+                  for arg in parser.args if isinstance(row.get(arg.dest or arg.name), Exception)}
+        if failed:
+            errors[index] = failed
+        else:
+            rows[index] = row
+    return rows, errors
+
+
+def _add_error(errors, index, name, message):
+    if isinstance(errors.get(index), dict):
+        errors[index][name] = message
+    else:
+        errors[index] = {name: message}
+
+
+def _check_unique(model, name, rows, errors):
+    column = getattr(model, name)
+    seen = {}
+    for index, row in rows.items():
+        value = row.get(name)
+        if value is None:
+            continue
+        if value in seen:
+            _add_error(errors, index, name, f'Duplicates item {seen[value]}.')
+        else:
+            seen[value] = index
+    if not seen:
+        return
+    taken = set(db.session.scalars(db.select(column).where(column.in_(seen))))
+    for value in taken:
+        _add_error(errors, seen[value], name, f'{value} already exists.')
+
+
+def _check_references(target, name, rows, errors):
+    wanted = {row[name] for row in rows.values() if row.get(name) is not None}
+    if not wanted:
+        return
+    found = set(db.session.scalars(db.select(target.id).where(target.id.in_(wanted))))
+    for index, row in rows.items():
+        if row.get(name) is not None and row[name] not in found:
+            _add_error(errors, index, name, f'{target.__tablename__} {row[name]} does not exist.')
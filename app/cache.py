@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from sqlalchemy import event
+from app.extension import db
+from app.conditional import entity_etag
+
+
+class EntityCache(object):
+    """Bounded LRU of serialized rows with a TTL, keyed by (table, id).
+
+    Entries are dropped after the transaction that changed their row ends:
+    flushed objects are collected in session.info and invalidated from the
+    after_commit hook. They are invalidated on rollback too, since a read
+    made inside the transaction may have cached a change that never landed.
+    Other worker processes only see the change once their copy expires, so
+    ENTITY_CACHE_TTL bounds how stale a multi-process deployment can be.
+    A value loaded while its key was invalidated is returned but not kept,
+    as it may have been read before the change committed.
+    """
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._watchers = {}
+        self._dependents = {}
+        # key -> [loads in flight, invalidations seen while they run]
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.setdefault('ENTITY_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.setdefault('ENTITY_CACHE_TTL', self.ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        return value
+
+    def fill(self, key, load):
+        """Call load() and cache its value under key, unless it is None or
+        key was invalidated while load ran."""
+        with self._lock:
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            generation = loading[1]
+        value = None
+        try:
+            value = load()
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if not loading[0]:
+                    del self._loading[key]
+                if value is not None and loading[1] == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._loading:
+                self._loading[key][1] += 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self, table=None):
+        with self._lock:
+            for key, loading in self._loading.items():
+                if table is None or key[0] == table:
+                    loading[1] += 1
+            keys = [key for key in self._entries if table is None or key[0] == table]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def watch(self, model, keys, clear=None):
+        """Also invalidate keys(obj) whenever an instance of model changes.
+
+        Bulk statements on model's table carry no objects to call keys on,
+        so they clear every entry whose key starts with clear instead.
+        """
+        self._watchers.setdefault(model, []).append(keys)
+        if clear is not None:
+            self._dependents.setdefault(model.__tablename__, set()).add(clear)
+
+    def dependents(self, table):
+        """Key prefixes to clear when a bulk statement writes table."""
+        return self._dependents.get(table, set())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def keys_for(self, obj):
+        # bookkeeping tables such as revoked_tokens are not keyed by id
+        keys = {(obj.__tablename__, obj.id)} if hasattr(obj, 'id') else set()
+        for watcher in self._watchers.get(type(obj), ()):
+            keys.update(watcher(obj))
+        return keys
+
+
+entity_cache = EntityCache()
+
+
+def cached(key, load):
+    """load() read through the entity cache under key. None is never cached."""
+    # a key changed by this session's open transaction is read, not cached
+    uncommitted = key in db.session.info.get('entity_cache_keys', ())
+    if uncommitted:
+        return load()
+    value = entity_cache.get(key)
+    if value is None:
+        value = entity_cache.fill(key, load)
+    return value
+
+
+def cached_entity(model, id, serializer):
+    """(data, etag) for a row marshalled with serializer, read through the
+    entity cache. None when the row does not exist."""
+    def load():
+        obj = model.query.filter_by(id=id).first()
+        return None if obj is None else (serializer.dump(obj), entity_etag(obj))
+    return cached((model.__tablename__, id), load)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    pending = session.info.setdefault('entity_cache_keys', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        pending.update(entity_cache.keys_for(obj))
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _collect_bulk(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = state.statement.table.name
+    tables = state.session.info.setdefault('entity_cache_tables', set())
+    # bulk UPDATE/DELETE can touch any row, so the whole table goes;
+    # new rows have no entries of their own but may feed watched ones
+    if not state.is_insert:
+        tables.add(table)
+    tables.update(entity_cache.dependents(table))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_committed(session):
+    for key in session.info.pop('entity_cache_keys', ()):
+        entity_cache.invalidate(key)
+    for table in session.info.pop('entity_cache_tables', ()):
+        entity_cache.clear(table)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _invalidate_rolled_back(session):
+    _invalidate_committed(session)
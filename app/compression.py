@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Streamed bodies are flushed to the client every this many input bytes
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+class _BodyCache(object):
+    """LRU of compressed bodies, bounded by their total size in bytes."""
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body, limit):
+        if len(body) > limit:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class Compress(object):
+    """gzip / brotli Content-Encoding for API responses.
+
+    The encoding is negotiated from Accept-Encoding (brotli is preferred when
+    the module is installed). Only mimetypes listed in COMPRESS_LEVELS are
+    compressed, at the level given there, and buffered bodies smaller than
+    COMPRESS_MIN_SIZE are left alone. Streamed responses are compressed
+    chunk by chunk. Compressed GET bodies are kept in an LRU of up to
+    COMPRESS_CACHE_SIZE bytes, keyed by a digest of the identity body, so
+    repeated hits on an unchanged representation skip the compressor.
+    """
+    def __init__(self, app=None):
+        self.cache = _BodyCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVELS', {'application/json': 6})
+        app.config.setdefault('COMPRESS_CACHE_SIZE', 32 * 1024 * 1024)
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        config = current_app.config
+        level = config['COMPRESS_LEVELS'].get(response.mimetype)
+        if (level is None or response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < config['COMPRESS_MIN_SIZE']:
+                return response
+            key = None
+            if request.method == 'GET':
+                # not the ETag: one validator may cover several pages or fieldsets
+                key = (hashlib.sha1(body).hexdigest(), encoding, level)
+            compressed = self.cache.get(key) if key else None
+            if compressed is None:
+                compressed = _compress(body, encoding, level)
+                if key:
+                    self.cache.put(key, compressed, config['COMPRESS_CACHE_SIZE'])
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        # the compressed bytes differ from the identity ones, so a strong
+        # validator would lie about byte equality
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _compress(body, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(level, 11))
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def _stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        compress = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_SIZE:
+                out += flush()
+                pending = 0
+            if out:
+                yield out
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
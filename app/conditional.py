@@ -0,0 +1,92 @@
+import hashlib
+import re
+from datetime import timezone
+from urllib.parse import urlencode
+
+from flask import Response, request
+from flask_restful import abort
+from werkzeug.http import http_date, quote_etag
+from app.streaming import wants_ndjson
+from app.watermarks import table_watermark
+
+
+_VARIANT = re.compile(r'-q[0-9a-f]{16}$')
+
+
+def entity_etag(obj):
+    """Strong validator for a row, changed by its version_id_col on every update."""
+    return f'{obj.__tablename__}-{obj.id}-{obj.version_id}'
+
+
+def variant_etag(etag):
+    """etag narrowed to the representation the query string selects.
+
+    A ?fields= subset is a different body from the full resource, so it
+    gets its own tag. Parameters are sorted, and so are the names listed in
+    ?fields=, so equivalent URLs share one tag.
+    """
+    params = []
+    for key, value in request.args.items(multi=True):
+        if key == 'fields':
+            value = ','.join(sorted({name.strip() for name in value.split(',') if name.strip()}))
+        if value:
+            params.append((key, value))
+    if not params:
+        return etag
+    return f'{etag}-q{hashlib.sha1(urlencode(sorted(params)).encode()).hexdigest()[:16]}'
+
+
+def collection_validators(model):
+    """ETag and Last-Modified for a collection, read from its table watermark.
+
+    The watermark moves on every write to the table, so this costs one
+    primary key lookup however many rows the collection holds.
+    """
+    version, updated_at = table_watermark(model)
+    etag = f'{model.__tablename__}-v{version}'
+    if wants_ndjson():
+        etag += '-ndjson'
+    # every page, filter and fieldset of the collection is its own body
+    etag = variant_etag(etag)
+    last_modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0) if updated_at else None
+    return etag, last_modified
+
+
+def etag_headers(etag, last_modified=None):
+    headers = {'ETag': quote_etag(etag)}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def fresh(etag, last_modified=None):
+    """True when the client's If-None-Match shows its copy is still current.
+
+    If-Modified-Since is only consulted for responses without an ETag:
+    HTTP dates have one second granularity, so a write landing in the same
+    second as the client's copy would otherwise be answered with a 304.
+    """
+    if request.if_none_match:
+        return etag is not None and request.if_none_match.contains_weak(etag)
+    if etag is None and last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def not_modified(etag, last_modified=None):
+    """An empty 304 carrying the validators, built without touching the marshaller."""
+    resp = Response(status=304)
+    resp.headers.extend(etag_headers(etag, last_modified))
+    return resp
+
+
+def check_if_match(etag):
+    """Abort with 412 when If-Match is sent and does not name etag.
+
+    The comparison ignores the weak flag so that tags weakened by response
+    compression still match the row they were derived from, and the
+    variant_etag suffix so that a tag read with ?fields= does too.
+    """
+    tags = request.if_match
+    if tags and not (tags.star_tag or any(_VARIANT.sub('', tag) == etag for tag in tags.as_set(include_weak=True))):
+        abort(412, message='Precondition failed: the resource has been modified.')
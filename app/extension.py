@@ -1,3 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from app.compression import Compress
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+compress = Compress()
\ No newline at end of file
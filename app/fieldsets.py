@@ -0,0 +1,37 @@
+from flask_restful import reqparse, abort
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+# Query string parser
+fieldset_args = reqparse.RequestParser()
+fieldset_args.add_argument('fields', type=str, location='args', help="Fields must be a comma separated list")
+
+
+def fieldset(serializer):
+    """Narrow a serializer to the fields listed in ?fields=."""
+    requested = fieldset_args.parse_args()['fields']
+    if not requested:
+        return serializer
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = names - serializer.fields.keys()
+    if unknown:
+        abort(400, message=f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return serializer.only(names)
+
+
+def load_fields(query, output_fields, *columns):
+    """Restrict query to the columns needed to render output_fields.
+
+    Extra columns, such as the keys a page is sorted on, and the version
+    counter used for ETags are loaded too so reading them later never
+    triggers a lazy load per row.
+    """
+    model = query.column_descriptions[0]['entity']
+    mapper = inspect(model)
+    names = [getattr(field, 'attribute', None) or key for key, field in output_fields.items()]
+    names += [column.key for column in columns]
+    if mapper.version_id_col is not None:
+        names.append(mapper.get_property_by_column(mapper.version_id_col).key)
+    attrs = mapper.column_attrs
+    return query.options(load_only(*[getattr(model, name) for name in dict.fromkeys(names) if name in attrs]))
@@ -4,3 +4,7 @@ from app.models.course import CourseModel
 from app.models.enrollment import EnrollmentModel
 from app.models.user import UserModel
 from app.models.fee import FeeModel
+
+from app.models.table_version import TableVersionModel
+from app.models.revoked_token import RevokedTokenModel
+from app.models.fee_balance import FeeBalanceModel
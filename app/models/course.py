@@ -6,8 +6,11 @@ class CourseModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(20), unique=True, nullable=False)
     name = db.Column(db.String(120), unique=True, nullable=False)
-    credits = db.Column(db.Integer, nullable=False)
-    teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'))
+    # active_history keeps the old value for the workload hook in app.workloads
+    credits = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)
+    teacher_id = db.column_property(db.Column(db.Integer, db.ForeignKey('teachers.id'), index=True), active_history=True)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
     enrollments = db.relationship('EnrollmentModel', backref='course', lazy=True)
 
     def __repr__(self):
@@ -3,12 +3,19 @@ from datetime import datetime, timezone
 
 class EnrollmentModel(db.Model):
     __tablename__ = 'enrolments'
+    __table_args__ = (
+        # one enrollment per student and course; also serves lookups by student_id
+        db.Index('uq_enrolments_student_id_course_id', 'student_id', 'course_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
     enrollment_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     grade = db.Column(db.String(2))
-    status = db.Column(db.String(20), default='enrolled') #enrolled, completed, dropped
+    status = db.Column(db.String(20), default='enrolled', index=True) #enrolled, completed, dropped
+    semester = db.Column(db.String(20))
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
 
     def __repr__(self):
         return f"Enrollment: {self.id}"
\ No newline at end of file
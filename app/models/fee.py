@@ -4,13 +4,21 @@ from datetime import datetime, timezone
 
 class FeeModel(db.Model):
     __tablename__ = 'fees'
+    __table_args__ = (
+        db.Index('ix_fees_status_semester', 'status', 'semester'),
+        db.Index('ix_fees_student_id_payment_date', 'student_id', 'payment_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    # active_history keeps the old value of the columns fee_balances is
+    # keyed and summed on, so the flush hook in app.balances can subtract it
+    student_id = db.column_property(db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False), active_history=True)
+    amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
     fee_type = db.Column(db.String(50), nullable=False) #tution, accomodation, graduation
-    semester = db.Column(db.String(20))
+    semester = db.column_property(db.Column(db.String(20)), active_history=True)
     payment_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    status = db.Column(db.String(20), default='pending') #paid, overdue
+    status = db.column_property(db.Column(db.String(20), default='pending'), active_history=True) #paid, overdue
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
 
     def __repr__(self):
         return f"Fee {self.id } - {self.fee_type}"
@@ -0,0 +1,16 @@
+from app.extension import db
+
+
+class FeeBalanceModel(db.Model):
+    """Per student and semester totals of the fees table, kept up to date by app.balances."""
+    __tablename__ = 'fee_balances'
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    semester = db.Column(db.String(20), primary_key=True) # '' for fees without a semester
+    fee_count = db.Column(db.Integer, nullable=False, default=0)
+    billed = db.Column(db.Float, nullable=False, default=0)
+    paid = db.Column(db.Float, nullable=False, default=0)
+    pending = db.Column(db.Float, nullable=False, default=0)
+    overdue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Balance {self.student_id} {self.semester}"
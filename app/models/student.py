@@ -12,6 +12,8 @@ class StudentModel(db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     date_of_birth = db.Column(db.Date)
     enrollment_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
     enrollments = db.relationship('EnrollmentModel', backref='student', lazy=True)
     fees = db.relationship('FeeModel', backref='student_ref', lazy=True)
     
@@ -0,0 +1,11 @@
+from app.extension import db
+
+
+class TableVersionModel(db.Model):
+    __tablename__ = 'table_versions'
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"{self.table_name} v{self.version}"
@@ -8,11 +8,15 @@ class TeacherModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(80), nullable=False)
     last_name = db.Column(db.String(80), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     phone = db.Column(db.String(20))
     department = db.Column(db.String(100))
-    credits = db.Column(db.Integer, default=0)
+    # derived from the courses taught, maintained by app.workloads
+    credits = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    course_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     hire_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
     courses= db.relationship('CourseModel', backref='teacher', lazy=True)
 
     def __repr__(self):
@@ -7,8 +7,11 @@ class UserModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(80), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    roles = db.Column(db.String(120), nullable=False, server_default='user') #comma separated, e.g. user,admin
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
 
     def __repr__(self):
         return f"{self.username} {self.email}"
\ No newline at end of file
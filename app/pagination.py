@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_restful import reqparse, abort
+from app.extension import db
+
+
+# Query string parser
+pagination_args = reqparse.RequestParser()
+pagination_args.add_argument('after', type=str, location='args', help="Cursor must be a string")
+pagination_args.add_argument('limit', type=int, location='args', help="Limit must be an integer")
+
+
+def check_limit(limit):
+    """Abort with 400 unless limit is unset or a positive integer."""
+    if limit is not None and limit < 1:
+        abort(400, message='Limit must be a positive integer.')
+    return limit
+
+
+def encode_cursor(values):
+    """Pack the sort key of the last row of a page into an opaque cursor."""
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order):
+    """Unpack a cursor into one sort key value per column of order."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError(cursor)
+        return [_coerce(column, value) for (column, _), value in zip(order, values)]
+    except (ValueError, TypeError, binascii.Error):
+        abort(400, message='Invalid cursor.')
+
+
+def paginate(query, order):
+    """Return one page of query and the headers pointing at the next one.
+
+    order is a list of (column, descending) pairs whose last column is
+    unique, so a cursor always names exactly one row. Pages are fetched by
+    seeking past the previous page's last key rather than with OFFSET, so
+    every page costs the same index range scan however deep the client is.
+    """
+    args = pagination_args.parse_args()
+    limit = check_limit(args['limit'])
+    if limit is None:
+        limit = current_app.config['PAGE_SIZE']
+    limit = min(limit, current_app.config['MAX_PAGE_SIZE'])
+
+    items = keyset(query, order, args['after']).limit(limit + 1).all()
+
+    headers = {}
+    if len(items) > limit:
+        items = items[:limit]
+        cursor = encode_cursor([getattr(items[-1], column.key) for column, _ in order])
+        headers['X-Next-Cursor'] = cursor
+        headers['Link'] = f'<{_page_url(cursor, limit)}>; rel="next"'
+    return items, headers
+
+
+def keyset(query, order, after=None):
+    """Order query by order and skip past the row named by the cursor after."""
+    if after:
+        query = query.filter(_seek(order, decode_cursor(after, order)))
+    return query.order_by(*[_sort(column, descending) for column, descending in order])
+
+
+def _nullable(column):
+    return getattr(column.expression, 'nullable', False)
+
+
+def _coerce(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    if python_type is int and not isinstance(value, int):
+        raise TypeError(value)
+    return python_type(value)
+
+
+def _sort(column, descending):
+    clause = column.desc() if descending else column.asc()
+    # NULLs always sort last so the seek below can treat them uniformly
+    return clause.nulls_last() if _nullable(column) else clause
+
+
+def _seek(order, values):
+    """WHERE clause matching the rows that sort strictly after values."""
+    clauses, prefix = [], []
+    for (column, descending), value in zip(order, values):
+        if value is None:
+            prefix.append(column.is_(None))
+            continue
+        after = column < value if descending else column > value
+        if _nullable(column):
+            after = db.or_(after, column.is_(None))
+        clauses.append(db.and_(*prefix, after))
+        prefix.append(column == value)
+    return db.or_(*clauses)
+
+
+def _page_url(cursor, limit):
+    params = [(k, v) for k, v in request.args.items(multi=True) if k not in ('after', 'limit')]
+    params += [('after', cursor), ('limit', limit)]
+    return f"{request.base_url}?{urlencode(params)}"
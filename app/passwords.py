@@ -0,0 +1,120 @@
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_restful import abort
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+passwords_cli = AppGroup('passwords', help='Password hashing commands.')
+
+
+class PasswordHasher(object):
+    """Runs password hashing and verification on a bounded thread pool.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so PASSWORD_WORKERS threads
+    hash in parallel while the request threads only wait on the result.
+    At most PASSWORD_QUEUE_SIZE further jobs may wait for a worker; past
+    that new ones are refused with a 503 straight away instead of piling up
+    behind the pool and tying up every request thread.
+    """
+    def __init__(self, app=None):
+        self._executor = None
+        self._slots = None
+        self._dummies = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_METHOD', 'scrypt:32768:8:1')
+        workers = app.config.setdefault('PASSWORD_WORKERS', os.cpu_count() or 1)
+        queue_size = app.config.setdefault('PASSWORD_QUEUE_SIZE', 16)
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='password')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        app.cli.add_command(passwords_cli)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            abort(503, message='Too many password operations in progress, try again shortly.')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, current_app.config['PASSWORD_METHOD'])
+
+    def verify(self, stored, password):
+        """Check password against the stored value.
+
+        Returns (matches, rehashed) where rehashed is a fresh hash whenever
+        the password matches but stored is a legacy plaintext value or was
+        made with other parameters than PASSWORD_METHOD, and None otherwise.
+        """
+        if not is_hash(stored):
+            matches = hmac.compare_digest(stored.encode(), password.encode())
+        else:
+            matches = self._run(check_password_hash, stored, password)
+            if not matches or stored.split('$', 1)[0] == current_app.config['PASSWORD_METHOD']:
+                return matches, None
+        return matches, self.hash(password) if matches else None
+
+    def dummy(self):
+        """A hash of nothing, to verify against when the user does not exist
+        so that unknown usernames take as long to reject as wrong passwords."""
+        method = current_app.config['PASSWORD_METHOD']
+        if method not in self._dummies:
+            self._dummies[method] = self.hash('')
+        return self._dummies[method]
+
+
+def is_hash(value):
+    """True for values made by werkzeug's generate_password_hash."""
+    return value.startswith(('scrypt:', 'pbkdf2:')) and value.count('$') == 2
+
+
+def _time(method, rounds=3):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        generate_password_hash('calibration', method)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[rounds // 2] * 1000
+
+
+@passwords_cli.command('calibrate')
+@click.option('--target', default=250, show_default=True, help='Target milliseconds per hash.')
+@click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt', show_default=True)
+def calibrate(target, algorithm):
+    """Pick the PASSWORD_METHOD cost closest to --target on this machine."""
+    if algorithm == 'scrypt':
+        # double N until a hash takes longer than the target
+        n = 2 ** 14
+        method, elapsed = f'scrypt:{n}:8:1', _time(f'scrypt:{n}:8:1')
+        while True:
+            candidate = f'scrypt:{n * 2}:8:1'
+            candidate_elapsed = _time(candidate)
+            if candidate_elapsed > target:
+                break
+            n *= 2
+            method, elapsed = candidate, candidate_elapsed
+    else:
+        # pbkdf2 time is linear in the iteration count
+        per_iteration = _time('pbkdf2:sha256:100000') / 100000
+        iterations = max(100000, round(target / per_iteration, -4))
+        method = f'pbkdf2:sha256:{iterations:.0f}'
+        elapsed = _time(method)
+    click.echo(f'PASSWORD_METHOD={method}  (~{elapsed:.0f} ms per hash)')
+    if method != current_app.config['PASSWORD_METHOD']:
+        click.echo(f"Currently {current_app.config['PASSWORD_METHOD']}; existing passwords are rehashed at their next login.")
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,48 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _Encoder(json.JSONEncoder):
+    """Stdlib fallback covering the types orjson handles natively."""
+    def default(self, obj):
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super().default(obj)
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def pretty():
+    """Whether JSON responses are indented: JSON_PRETTY, else debug mode."""
+    setting = current_app.config.get('JSON_PRETTY')
+    return current_app.debug if setting is None else setting
+
+
+def dumps(data, indent=False):
+    """Encode data as JSON bytes with orjson, or the stdlib when it is missing."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, cls=_Encoder, indent=2).encode()
+    return json.dumps(data, cls=_Encoder, separators=(',', ':')).encode()
+
+
+def output_json(data, code, headers=None):
+    """Makes a Flask response with a JSON encoded body"""
+    resp = make_response(dumps(data, pretty()) + b'\n', code)
+    resp.headers.extend(headers or {})
+    return resp
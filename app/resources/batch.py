@@ -0,0 +1,104 @@
+from flask import current_app, url_for
+from flask_restful import Resource, reqparse, inputs, abort
+from app.batch import run_batch
+
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Request parser
+batch_args = reqparse.RequestParser()
+batch_args.add_argument('requests', type=dict, action='append', required=True, location='json', help="Requests must be a list of objects")
+batch_args.add_argument('atomic', type=inputs.boolean, default=False, location='json', help="Atomic must be a boolean")
+
+
+class Batch(Resource):
+    def post(self):
+        """
+        Run several API requests in one round trip
+        ---
+        tags:
+          - Batch
+        summary: Run several API requests in one round trip
+        description: Each sub-request is dispatched in order through the same resources as a direct call, and the responses are returned together. The Authorization header of the batch is passed on to every sub-request. With atomic set, the batch stops at the first sub-request that fails and all of them are committed or rolled back as a single database transaction; ETags returned by a batch that was rolled back must not be reused.
+        parameters:
+          - in: body
+            name: body
+            required: true
+            schema:
+              type: object
+              properties:
+                requests:
+                  type: array
+                  description: The sub-requests to run, at most BATCH_MAX_REQUESTS
+                  items:
+                    type: object
+                    properties:
+                      method:
+                        type: string
+                        description: GET, POST, PUT, PATCH or DELETE
+                      path:
+                        type: string
+                        description: Path of the request including the query string (e.g. /api/students/1?fields=id,email)
+                      body:
+                        type: object
+                        description: JSON body of the request
+                      headers:
+                        type: object
+                        description: Extra request headers (e.g. If-None-Match). Accept-Encoding is ignored, and an Accept that rules out application/json gets a 406 sub-response
+                atomic:
+                  type: boolean
+                  description: Run every sub-request in one transaction (defaults to false)
+        responses:
+          200:
+            description: The batch was run
+            schema:
+              type: object
+              properties:
+                committed:
+                  type: boolean
+                  description: False when an atomic batch was rolled back
+                responses:
+                  type: array
+                  description: One response per sub-request that ran, in order
+                  items:
+                    type: object
+                    properties:
+                      status:
+                        type: integer
+                        description: HTTP status of the sub-request
+                      headers:
+                        type: object
+                        description: Response headers (ETag, Link, X-Next-Cursor, ...)
+                      body:
+                        description: Decoded JSON body, null when empty
+          400:
+            description: Bad request, one or more sub-requests are malformed. Nothing was run.
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating what went wrong.
+          413:
+            description: Too many sub-requests, the limit is BATCH_MAX_REQUESTS.
+        """
+        args = batch_args.parse_args()
+        requests = args['requests']
+        if len(requests) > current_app.config['BATCH_MAX_REQUESTS']:
+            abort(413, message=f"At most {current_app.config['BATCH_MAX_REQUESTS']} requests can be batched.")
+        errors = []
+        for index, sub in enumerate(requests):
+            sub['method'] = str(sub.get('method', 'GET')).upper()
+            path = sub.get('path')
+            if sub['method'] not in METHODS:
+                errors.append({'index': index, 'message': f"Method must be one of {', '.join(METHODS)}."})
+            elif not isinstance(path, str) or not path.startswith('/api/'):
+                errors.append({'index': index, 'message': 'Path must start with /api/.'})
+            elif path.split('?')[0].rstrip('/') == url_for('batch'):
+                errors.append({'index': index, 'message': 'Batches cannot be nested.'})
+            elif not isinstance(sub.get('headers') or {}, dict):
+                errors.append({'index': index, 'message': 'Headers must be an object.'})
+        if errors:
+            abort(400, message='Invalid batch, nothing was run.', errors=errors)
+        responses, committed = run_batch(requests, args['atomic'])
+        return {'committed': committed, 'responses': responses}, 200
@@ -0,0 +1,45 @@
+from flask_restful import Resource
+from app.cache import entity_cache
+
+
+class CacheStats(Resource):
+    def get(self):
+        """
+        Get entity cache statistics
+        ---
+        tags:
+          - Cache
+        summary: Retrieve hit and miss counters of the entity cache
+        description: This endpoint reports the size and counters of the in-process cache serving item GETs, for sizing ENTITY_CACHE_SIZE and ENTITY_CACHE_TTL.
+        responses:
+          200:
+            description: Cache statistics retrieved successfully
+            schema:
+              type: object
+              properties:
+                size:
+                  type: integer
+                  description: Number of entries currently cached
+                maxsize:
+                  type: integer
+                  description: Maximum number of entries (ENTITY_CACHE_SIZE)
+                ttl:
+                  type: integer
+                  description: Seconds an entry is served before being reloaded (ENTITY_CACHE_TTL)
+                hits:
+                  type: integer
+                  description: Lookups answered from the cache
+                misses:
+                  type: integer
+                  description: Lookups that went to the database
+                hit_ratio:
+                  type: number
+                  description: hits / (hits + misses), null before the first lookup
+                evictions:
+                  type: integer
+                  description: Entries dropped to stay within maxsize
+                invalidations:
+                  type: integer
+                  description: Entries dropped because their row changed
+        """
+        return entity_cache.stats(), 200
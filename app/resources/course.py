@@ -1,6 +1,16 @@
-from flask_restful import Resource, marshal_with, fields, reqparse,abort
+from flask_restful import Resource, fields, reqparse,abort
 from app.models.course import CourseModel
+from app.models.teacher import TeacherModel
+from app.models.student import StudentModel
+from app.models.enrollment import EnrollmentModel
 from app.extension import db
+from app.pagination import paginate
+from app.bulk import bulk_create
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.cache import cached_entity
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
 
 
 
@@ -13,6 +23,9 @@ course_args.add_argument('name', type=str, required=True, help="Course name cann
 course_args.add_argument('credits', type=int, default=0, help="Credits must be an integer")
 course_args.add_argument('teacher_id', type=int, required=True, help="Teacher ID is required")
 
+roster_args = reqparse.RequestParser()
+roster_args.add_argument('status', type=str, location='args')
+
 
 #response fields
 course_fields = {
@@ -23,9 +36,9 @@ course_fields = {
     'teacher_id': fields.Integer
     
 }
+course_serializer = Serializer(course_fields)
 # course resource
 class Courses(Resource):
-    @marshal_with(course_fields)
     def get(self):
         """
         Get all courses
@@ -34,6 +47,25 @@ class Courses(Resource):
             - Courses
         summary: Retrieve all courses
         description: This endpoint retrieves all courses from the system.
+        parameters:
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+            - application/json
+            - application/x-ndjson
         responses:
             200:
                 description: List of all courses retrieved successfully
@@ -66,12 +98,21 @@ class Courses(Resource):
                             type: string
                             description: Error message indicating that no courses were found
         """
-        courses = CourseModel.query.all()
+        serializer = fieldset(course_serializer)
+        etag, last_modified = collection_validators(CourseModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(CourseModel.id, False)]
+        query = load_fields(CourseModel.query, serializer.fields)
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        courses, headers = paginate(query, order)
         if not courses:
             abort(404, message='Courses not found')
-        return courses
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(courses), 200, headers
     
-    @marshal_with(course_fields)
+    @marshal_with(course_serializer)
     def post(self):
         """
         Create a new course
@@ -125,8 +166,235 @@ class Courses(Resource):
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error .could not create a course {str(e)}")
+class CoursesBulk(Resource):
+    # Create many courses at once
+    def post(self):
+        """
+        Create courses in bulk
+        ---
+        tags:
+            - Courses
+        summary: Create many courses in a single request
+        description: Takes a JSON array of courses in the same shape as a single create. Every item is validated first; if any item is invalid nothing is created and the errors are listed by index. Otherwise all items are inserted in one transaction.
+        parameters:
+            - in: body
+              name: body
+              required: true
+              schema:
+                  type: array
+                  items:
+                      type: object
+        responses:
+            201:
+                description: Courses created successfully
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            index:
+                                type: integer
+                                description: Position of the item in the request array
+                            id:
+                                type: integer
+                                description: The unique identifier of the created course
+            400:
+                description: Bad request, one or more items are invalid. Nothing was created.
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Summary of the failure.
+                        errors:
+                            type: array
+                            description: Errors of each invalid item, by index.
+                            items:
+                                type: object
+            413:
+                description: Too many items, the limit is BULK_MAX_ITEMS.
+        """
+        return bulk_create(CourseModel, course_args, unique=('code', 'name'), references={'teacher_id': TeacherModel}), 201
+
+class TeacherCourses(Resource):
+    # Courses taught by one teacher
+    def get(self, id):
+        """
+        Get the courses of a teacher
+        ---
+        tags:
+            - Courses
+        summary: Retrieve the courses taught by a teacher
+        description: Lists the courses whose teacher_id is the given teacher, read through the index on teacher_id.
+        parameters:
+            - in: path
+              name: id
+              type: integer
+              required: true
+              description: The unique identifier of the teacher
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,code)
+        responses:
+            200:
+                description: The teacher's courses, empty if the teacher has none
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            id:
+                                type: integer
+                                description: The unique identifier of the course
+                            code:
+                                type: string
+                                description: The code of the course
+                            name:
+                                type: string
+                                description: The name of the course
+                            credits:
+                                type: integer
+                                description: The number of credits for the course
+                            teacher_id:
+                                type: integer
+                                description: The ID of the teacher for the course
+            404:
+                description: Teacher not found
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Error message indicating that the teacher was not found
+        """
+        serializer = fieldset(course_serializer)
+        order = [(CourseModel.id, False)]
+        query = load_fields(CourseModel.query.filter_by(teacher_id=id), serializer.fields)
+        courses, headers = paginate(query, order)
+        # only an empty page needs to tell a missing teacher from one without courses
+        if not courses and not db.session.query(TeacherModel.id).filter_by(id=id).first():
+            abort(404, message='Teacher not found')
+        return serializer.dump(courses), 200, headers
+
+class CourseRoster(Resource):
+    # Students of one course with their enrollment status and grade
+    def get(self, id):
+        """
+        Get the roster of a course
+        ---
+        tags:
+            - Courses
+        summary: Retrieve the roster of a course
+        description: Lists the course's enrollments in last name order with the student's name, student_id, status and grade, one join of enrolments and students per page. Also returns the number of enrollments per status, counted with one grouped query over the whole course.
+        parameters:
+            - in: path
+              name: id
+              type: integer
+              required: true
+              description: The unique identifier of the course
+            - in: query
+              name: status
+              type: string
+              required: false
+              description: Only list enrollments with this status (the counts always cover every status)
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of students to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        responses:
+            200:
+                description: A page of the roster
+                schema:
+                    type: object
+                    properties:
+                        course:
+                            type: object
+                            description: The course, with its id, code, name, credits and teacher_id
+                        counts:
+                            type: object
+                            description: Number of enrollments per status, keyed by status
+                        total:
+                            type: integer
+                            description: Number of enrollments in the course
+                        students:
+                            type: array
+                            items:
+                                type: object
+                                properties:
+                                    id:
+                                        type: integer
+                                        description: The unique identifier of the enrollment
+                                    status:
+                                        type: string
+                                        description: The status of the enrollment
+                                    grade:
+                                        type: string
+                                        description: The grade awarded, if any
+                                    semester:
+                                        type: string
+                                        description: The semester of the enrollment
+                                    student:
+                                        type: object
+                                        description: The student, with id, student_id, first_name and last_name
+            404:
+                description: Course not found
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Error message indicating that the course was not found
+        """
+        args = roster_args.parse_args()
+        cached = cached_entity(CourseModel, id, course_serializer)
+        if cached is None:
+            abort(404, message='Course not found')
+        # a PATCH can null the status; such enrollments read as the column default
+        status = db.func.coalesce(EnrollmentModel.status, 'enrolled')
+        counts = dict(db.session.execute(
+            db.select(status, db.func.count())
+            .where(EnrollmentModel.course_id == id)
+            .group_by(status)
+        ).all())
+
+        query = db.session.query(
+            EnrollmentModel.id, status.label('status'), EnrollmentModel.grade, EnrollmentModel.semester,
+            StudentModel.id.label('student'), StudentModel.student_id,
+            StudentModel.first_name, StudentModel.last_name,
+        ).join(StudentModel, StudentModel.id == EnrollmentModel.student_id).filter(EnrollmentModel.course_id == id)
+        if args['status'] is not None:
+            query = query.filter(status == args['status'])
+        order = [(StudentModel.last_name, False), (StudentModel.first_name, False), (EnrollmentModel.id, False)]
+        rows, headers = paginate(query, order)
+        students = [{
+            'id': row.id,
+            'status': row.status,
+            'grade': row.grade,
+            'semester': row.semester,
+            'student': {'id': row.student, 'student_id': row.student_id,
+                        'first_name': row.first_name, 'last_name': row.last_name},
+        } for row in rows]
+        return {'course': cached[0], 'counts': counts, 'total': sum(counts.values()), 'students': students}, 200, headers
+
 class Course(Resource):
-    @marshal_with(course_fields)
     def get(self, id):
         """
         Get a course by id
@@ -141,6 +409,11 @@ class Course(Resource):
               required: true
               type: integer
               description: The unique identifier of the course to retrieve
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
         responses:
             200:
                 description: Course retrieved successfully
@@ -162,6 +435,8 @@ class Course(Resource):
                         teacher_id:
                             type: integer
                             description: The ID of the teacher for the course
+            304:
+                description: Not modified, the ETag sent in If-None-Match is still current
             404:
                 description: Course not found
                 schema:
@@ -171,11 +446,16 @@ class Course(Resource):
                             type: string
                             description: Error message indicating that the course was not found
         """
-        course = CourseModel.query.filter_by(id=id).first()
-        if not course:
+        serializer = fieldset(course_serializer)
+        cached = cached_entity(CourseModel, id, course_serializer)
+        if cached is None:
             abort(404, message='Course not found')
-        return course
-    @marshal_with(course_fields)
+        data, etag = cached
+        etag = variant_etag(etag)
+        if fresh(etag):
+            return not_modified(etag)
+        return {key: data[key] for key in serializer.fields}, 200, etag_headers(etag)
+    @marshal_with(course_serializer)
     def put(self, id):
         """ 
         Update a course by id
@@ -211,6 +491,8 @@ class Course(Resource):
                         teacher_id:
                             type: integer
                             description: The ID of the teacher for the course
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Course not found
                 schema:
@@ -232,17 +514,18 @@ class Course(Resource):
         course = CourseModel.query.filter_by(id=id).first()
         if not course:
             abort(404, message='Course not found')
+        check_if_match(entity_etag(course))
         try:
             course.code = args['code']
             course.name = args['name']
             course.credits = args['credits']
             course.teacher_id = args['teacher_id']
             db.session.commit()
-            return course, 200
+            return course, 200, etag_headers(entity_etag(course))
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error .could not update a course {str(e)}")
-    @marshal_with(course_fields)
+    @marshal_with(course_serializer)
     def patch(self, id):
         """
         Update a course by id
@@ -278,6 +561,8 @@ class Course(Resource):
                         teacher_id:
                             type: integer
                             description: The ID of the teacher for the course
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Course not found
                 schema:
@@ -299,17 +584,18 @@ class Course(Resource):
         course = CourseModel.query.filter_by(id=id).first()
         if not course:
             abort(404, message='Course not found')
+        check_if_match(entity_etag(course))
         try:
             course.code = args['code']
             course.name = args['name']
             course.credits = args['credits']
             course.teacher_id = args['teacher_id']
             db.session.commit()
-            return course, 200
+            return course, 200, etag_headers(entity_etag(course))
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error .could not update a course {str(e)}")
-    @marshal_with(course_fields)
+    @marshal_with(course_serializer)
     def delete(self, id):
         """
         Delete a course by id
@@ -327,6 +613,8 @@ class Course(Resource):
         responses:
             204:
                 description: Course deleted successfully
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Course not found
                 schema:
@@ -339,6 +627,7 @@ class Course(Resource):
         course = CourseModel.query.filter_by(id=id).first()
         if not course:
             abort(404, message='Course not found')
+        check_if_match(entity_etag(course))
         db.session.delete(course)
         db.session.commit()
         return '', 204
\ No newline at end of file
@@ -1,6 +1,19 @@
-from flask_restful import Resource, marshal_with, fields, reqparse, abort
+from flask_restful import Resource, fields, reqparse, abort
 from app.models.enrollment import EnrollmentModel
+from app.models.course import CourseModel
+from app.models.student import StudentModel
 from app.extension import db
+from app.pagination import paginate
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
+from app.transcripts import cached_transcript
+from sqlalchemy.orm import joinedload
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from dateutil import parser as date_parser
 #request parser
 enrollment_args = reqparse.RequestParser()
@@ -8,17 +21,41 @@ enrollment_args.add_argument('student_id', type=int, required=True, help="Studen
 enrollment_args.add_argument('course_id', type=int, required=True, help="Course ID cannot be empty")
 enrollment_args.add_argument('enrollment_date', type=date_parser)
 enrollment_args.add_argument('status', type=str, default='active')
+enrollment_args.add_argument('grade', type=str)
+enrollment_args.add_argument('semester', type=str)
+
+bulk_enrollment_args = reqparse.RequestParser()
+bulk_enrollment_args.add_argument('student_ids', type=int, action='append', required=True, location='json', help="Student IDs must be a list of integers")
+bulk_enrollment_args.add_argument('status', type=str, default='active', location='json')
 #response fields
 enrollment_fields = {
     'id': fields.Integer,
     'student_id': fields.Integer,
     'course_id': fields.Integer,
     'enrollment_date': fields.DateTime,
-    'status': fields.String
+    'status': fields.String,
+    'grade': fields.String,
+    'semester': fields.String
 }
+enrollment_serializer = Serializer(enrollment_fields)
+
+# enrollments listed under a student carry their course, loaded in the same query
+student_enrollment_fields = dict(enrollment_fields, course=fields.Nested({
+    'id': fields.Integer,
+    'code': fields.String,
+    'name': fields.String,
+    'credits': fields.Integer
+}))
+student_enrollment_serializer = Serializer(student_enrollment_fields)
+
+
+def is_duplicate_enrollment(error):
+    # SQLite reports the columns of the violated index, PostgreSQL and MySQL its name
+    message = str(error.orig)
+    return ('uq_enrolments_student_id_course_id' in message
+            or 'enrolments.student_id, enrolments.course_id' in message)
 #enrollment resource
 class Enrollments(Resource):
-    @marshal_with(enrollment_fields)
     def get(self):
         """
         Get all enrollments
@@ -27,6 +64,25 @@ class Enrollments(Resource):
           - Enrollments
         summary: Retrieve all enrollments
         description: This endpoint retrieves all enrollments from the system.
+        parameters:
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+          - application/json
+          - application/x-ndjson
         responses:
           200:
             description: List of all enrollments retrieved successfully
@@ -51,6 +107,12 @@ class Enrollments(Resource):
                   status:
                     type: string
                     description: The status of the enrollment (e.g., active, completed, dropped)
+                  grade:
+                    type: string
+                    description: The grade awarded for the course, if any
+                  semester:
+                    type: string
+                    description: The semester the course is taken in (e.g., 2025-1)
           404:
             description: Enrollments not found
             schema:
@@ -60,12 +122,21 @@ class Enrollments(Resource):
                   type: string
                   description: Error message indicating that no enrollments were found
         """
-        enrollments = EnrollmentModel.query.all()
+        serializer = fieldset(enrollment_serializer)
+        etag, last_modified = collection_validators(EnrollmentModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(EnrollmentModel.id, False)]
+        query = load_fields(EnrollmentModel.query, serializer.fields)
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        enrollments, headers = paginate(query, order)
         if not enrollments:
             abort(404, message='Enrollments not found')
-        return enrollments
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(enrollments), 200, headers
 
-    @marshal_with(enrollment_fields)
+    @marshal_with(enrollment_serializer)
     def post(self):
         """
         Create a new enrollment
@@ -96,6 +167,12 @@ class Enrollments(Resource):
                 status:
                   type: string
                   description: The status of the enrollment (e.g., active, completed, dropped)
+                grade:
+                  type: string
+                  description: The grade awarded for the course, if any
+                semester:
+                  type: string
+                  description: The semester the course is taken in (e.g., 2025-1)
           400:
             description: Error creating enrollment
             schema:
@@ -104,6 +181,8 @@ class Enrollments(Resource):
                 message:
                   type: string
                   description: Error message indicating that the enrollment could not be created
+          409:
+            description: The student is already enrolled in this course
         """
         args = enrollment_args.parse_args()
         try:
@@ -111,16 +190,285 @@ class Enrollments(Resource):
                 student_id=args['student_id'],
                 course_id=args['course_id'],
                 enrollment_date=args['enrollment_date'],
-                status=args['status']
+                status=args['status'],
+                grade=args['grade'],
+                semester=args['semester']
             )
             db.session.add(enrollment)
             db.session.commit()
             return enrollment, 201
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_duplicate_enrollment(e):
+                abort(409, message="The student is already enrolled in this course.")
+            abort(400, message=f"Error: Could not create an enrollment. {str(e)}")
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error: Could not create an enrollment. {str(e)}")
+def _insert_ignoring_duplicates():
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        module = sqlite if dialect == 'sqlite' else postgresql
+        return module.insert(EnrollmentModel).on_conflict_do_nothing(index_elements=['student_id', 'course_id'])
+    return insert(EnrollmentModel)
+
+class CourseEnrollmentsBulk(Resource):
+    # Enroll many students into one course at once
+    def post(self, id):
+        """
+        Enroll students into a course in bulk
+        ---
+        tags:
+          - Enrollments
+        summary: Enroll many students into a course in a single request
+        description: Looks up all the given students and their existing enrollments in the course with one query, skips students that are already enrolled or do not exist, and inserts the rest in one transaction.
+        parameters:
+          - in: path
+            name: id
+            type: integer
+            required: true
+            description: The unique identifier of the course
+          - in: body
+            name: body
+            required: true
+            schema:
+              type: object
+              properties:
+                student_ids:
+                  type: array
+                  items:
+                    type: integer
+                  description: The students to enroll
+                status:
+                  type: string
+                  description: The status of the new enrollments (defaults to active)
+        responses:
+          201:
+            description: At least one enrollment was created
+            schema:
+              type: object
+              properties:
+                created:
+                  type: array
+                  description: The new enrollments, as student_id and enrollment id pairs
+                  items:
+                    type: object
+                skipped:
+                  type: array
+                  description: Students already enrolled, with their existing enrollment id (null if a concurrent request enrolled them)
+                  items:
+                    type: object
+                unknown:
+                  type: array
+                  description: Student IDs that do not exist
+                  items:
+                    type: integer
+          200:
+            description: Nothing was created, every student was skipped or unknown
+          404:
+            description: Course not found
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating that the course was not found.
+          413:
+            description: Too many students, the limit is BULK_MAX_ITEMS.
+        """
+        args = bulk_enrollment_args.parse_args()
+        student_ids = list(dict.fromkeys(args['student_ids']))
+        if len(student_ids) > current_app.config['BULK_MAX_ITEMS']:
+            abort(413, message=f"At most {current_app.config['BULK_MAX_ITEMS']} students can be enrolled at once.")
+        if not db.session.query(CourseModel.id).filter_by(id=id).first():
+            abort(404, message='Course not found')
+
+        # one query answers both "does the student exist" and "is it already enrolled"
+        existing = dict(db.session.execute(
+            db.select(StudentModel.id, EnrollmentModel.id)
+            .outerjoin(EnrollmentModel, db.and_(EnrollmentModel.student_id == StudentModel.id,
+                                                EnrollmentModel.course_id == id))
+            .where(StudentModel.id.in_(student_ids))
+        ).all())
+        skipped = [{'student_id': sid, 'id': existing[sid]} for sid in student_ids if existing.get(sid)]
+        unknown = [sid for sid in student_ids if sid not in existing]
+        new = [sid for sid in student_ids if sid in existing and not existing[sid]]
+
+        created = []
+        if new:
+            # rows a concurrent registration inserted meanwhile are skipped by
+            # the unique index instead of failing the whole batch
+            statement = _insert_ignoring_duplicates().returning(EnrollmentModel.student_id, EnrollmentModel.id)
+            ids = dict(db.session.execute(
+                statement, [{'student_id': sid, 'course_id': id, 'status': args['status']} for sid in new]
+            ).all())
+            db.session.commit()
+            created = [{'student_id': sid, 'id': ids[sid]} for sid in new if sid in ids]
+            skipped += [{'student_id': sid, 'id': None} for sid in new if sid not in ids]
+        return {'created': created, 'skipped': skipped, 'unknown': unknown}, 201 if created else 200
+
+class StudentEnrollments(Resource):
+    # Enrollments of one student, each with its course
+    def get(self, id):
+        """
+        Get the enrollments of a student
+        ---
+        tags:
+          - Enrollments
+        summary: Retrieve the enrollments of a student with their courses
+        description: Lists the student's enrollments with the code, name and credits of each course, read in one joined query per page.
+        parameters:
+          - in: path
+            name: id
+            type: integer
+            required: true
+            description: The unique identifier of the student
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,course)
+        responses:
+          200:
+            description: The student's enrollments, empty if the student has none
+            schema:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    description: The unique identifier of the enrollment
+                  student_id:
+                    type: integer
+                    description: The ID of the student enrolled
+                  course_id:
+                    type: integer
+                    description: The ID of the course
+                  enrollment_date:
+                    type: string
+                    format: date-time
+                    description: The date when the student was enrolled in the course
+                  status:
+                    type: string
+                    description: The status of the enrollment (e.g., active, completed, dropped)
+                  grade:
+                    type: string
+                    description: The grade awarded for the course, if any
+                  semester:
+                    type: string
+                    description: The semester the course is taken in (e.g., 2025-1)
+                  course:
+                    type: object
+                    description: The course, with its id, code, name and credits
+          404:
+            description: Student not found
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating that the student was not found.
+        """
+        serializer = fieldset(student_enrollment_serializer)
+        order = [(EnrollmentModel.id, False)]
+        query = load_fields(EnrollmentModel.query.filter_by(student_id=id), serializer.fields)
+        if 'course' in serializer.fields:
+            query = query.options(joinedload(EnrollmentModel.course).load_only(
+                CourseModel.code, CourseModel.name, CourseModel.credits))
+        enrollments, headers = paginate(query, order)
+        # only an empty page needs to tell a missing student from one without enrollments
+        if not enrollments and not db.session.query(StudentModel.id).filter_by(id=id).first():
+            abort(404, message='Student not found')
+        return serializer.dump(enrollments), 200, headers
+
+class StudentTranscript(Resource):
+    # A student's enrollments grouped by semester with credit totals
+    def get(self, id):
+        """
+        Get the transcript of a student
+        ---
+        tags:
+          - Enrollments
+        summary: Retrieve a student's transcript
+        description: Lists the student's courses by semester with grade, status and credits, plus credits attempted and earned per semester and cumulatively. Everything comes from one SQL statement and is cached until the student's enrollments or their courses change. Attempted credits exclude dropped enrollments, earned credits count completed ones only.
+        parameters:
+          - in: path
+            name: id
+            type: integer
+            required: true
+            description: The unique identifier of the student
+        responses:
+          200:
+            description: The student's transcript
+            schema:
+              type: object
+              properties:
+                student_id:
+                  type: integer
+                  description: The unique identifier of the student
+                semesters:
+                  type: array
+                  description: One entry per semester in order, enrollments without a semester last
+                  items:
+                    type: object
+                    properties:
+                      semester:
+                        type: string
+                        description: The semester (null for enrollments without one)
+                      credits_attempted:
+                        type: integer
+                        description: Credits attempted in the semester
+                      credits_earned:
+                        type: integer
+                        description: Credits earned in the semester
+                      cumulative_attempted:
+                        type: integer
+                        description: Credits attempted up to and including the semester
+                      cumulative_earned:
+                        type: integer
+                        description: Credits earned up to and including the semester
+                      courses:
+                        type: array
+                        description: The enrollments of the semester with course code, name, credits, status and grade
+                        items:
+                          type: object
+                credits_attempted:
+                  type: integer
+                  description: Total credits attempted
+                credits_earned:
+                  type: integer
+                  description: Total credits earned
+          304:
+            description: The transcript has not changed since the ETag sent in If-None-Match
+          404:
+            description: Student not found
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating that the student was not found.
+        """
+        cached = cached_transcript(id)
+        if cached is None:
+            abort(404, message='Student not found')
+        data, etag = cached
+        if fresh(etag):
+            return not_modified(etag)
+        return data, 200, etag_headers(etag)
+
 class Enrollment(Resource):
-    @marshal_with(enrollment_fields)
     def get(self, id):
         """
         Get an enrollment by id
@@ -135,6 +483,11 @@ class Enrollment(Resource):
             required: true
             type: integer
             description: The unique identifier of the enrollment to retrieve
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
         responses:
             200:
                 description: Enrollment retrieved successfully
@@ -157,6 +510,14 @@ class Enrollment(Resource):
                     status:
                     type: string
                     description: The status of the enrollment (e.g., active, completed, dropped)
+                    grade:
+                    type: string
+                    description: The grade awarded for the course, if any
+                    semester:
+                    type: string
+                    description: The semester the course is taken in (e.g., 2025-1)
+            304:
+                description: Not modified, the ETag sent in If-None-Match is still current
             404:
                 description: Enrollment not found
                 schema:
@@ -166,12 +527,16 @@ class Enrollment(Resource):
                     type: string
                     description: Error message indicating that the enrollment was not found
             """
-        enrollment = EnrollmentModel.query.filter_by(id=id).first()
+        serializer = fieldset(enrollment_serializer)
+        enrollment = load_fields(EnrollmentModel.query, serializer.fields).filter_by(id=id).first()
         if not enrollment:
             abort(404, message='Enrollment not found')
-        return enrollment
+        etag = variant_etag(entity_etag(enrollment))
+        if fresh(etag):
+            return not_modified(etag)
+        return serializer.dump(enrollment), 200, etag_headers(etag)
 
-    @marshal_with(enrollment_fields)
+    @marshal_with(enrollment_serializer)
     def patch(self, id):
         """
         Update an enrollment by id
@@ -208,6 +573,14 @@ class Enrollment(Resource):
                     status:
                     type: string
                     description: The status of the enrollment (e.g., active, completed, dropped)
+                    grade:
+                    type: string
+                    description: The grade awarded for the course, if any
+                    semester:
+                    type: string
+                    description: The semester the course is taken in (e.g., 2025-1)
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Enrollment not found
                 schema:
@@ -224,22 +597,32 @@ class Enrollment(Resource):
                     message:
                     type: string
                     description: Error message indicating that the enrollment could not be updated
+            409:
+                description: The student is already enrolled in this course
         """
         args = enrollment_args.parse_args()
         enrollment = EnrollmentModel.query.filter_by(id=id).first()
         if not enrollment:
             abort(404, message='Enrollment not found')
+        check_if_match(entity_etag(enrollment))
         try:
             enrollment.student_id = args['student_id']
             enrollment.course_id = args['course_id']
             enrollment.enrollment_date = args['enrollment_date']
             enrollment.status = args['status']
+            enrollment.grade = args['grade']
+            enrollment.semester = args['semester']
             db.session.commit()
-            return enrollment, 200
+            return enrollment, 200, etag_headers(entity_etag(enrollment))
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_duplicate_enrollment(e):
+                abort(409, message="The student is already enrolled in this course.")
+            abort(400, message=f"Error: Could not update the enrollment. {str(e)}")
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error: Could not update the enrollment. {str(e)}")
-    @marshal_with(enrollment_fields)
+    @marshal_with(enrollment_serializer)
     def delete(self, id):
         """
         Delete an enrollment by id
@@ -257,6 +640,8 @@ class Enrollment(Resource):
         responses:
             204:
                 description: Enrollment deleted successfully
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Enrollment not found
                 schema:
@@ -277,6 +662,7 @@ class Enrollment(Resource):
         enrollment = EnrollmentModel.query.filter_by(id=id).first()
         if not enrollment:
             abort(404, message='Enrollment not found')
+        check_if_match(entity_etag(enrollment))
         try:
             db.session.delete(enrollment)
             db.session.commit()
@@ -1,18 +1,86 @@
-from flask_restful import Resource, marshal_with, fields, reqparse, abort
+from flask_restful import Resource, fields, reqparse, abort
 from app.models.fee import FeeModel
+from app.models.student import StudentModel
+from app.models.fee_balance import FeeBalanceModel
 from app.extension import db
-from datetime import datetime
+from app.pagination import paginate
+from app.bulk import bulk_create, import_csv
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
+from flask import request
+from datetime import timezone
 from dateutil import parser as date_parser
 
+def fee_date(value):
+    """Parse a date into the naive UTC form stored in the database."""
+    value = date_parser.parse(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 # Request Parser
 fee_args = reqparse.RequestParser()
 fee_args.add_argument('student_id', type=int, required=True, help="Student ID cannot be empty.")
 fee_args.add_argument('amount', type=float, required=True, help="Amount cannot be empty.")
-fee_args.add_argument('payment_date', type=date_parser)
+fee_args.add_argument('payment_date', type=fee_date, help="Invalid date format.")
 fee_args.add_argument('status', type=str, default='pending', help="Status defaults to 'pending'.")
 fee_args.add_argument('semester', type=str, help="Semester cannot be empty.")
 fee_args.add_argument('fee_type', type=str, required=True, help="Fee type cannot be empty.")
 
+# Query string filters
+fee_filter_args = reqparse.RequestParser()
+fee_filter_args.add_argument('status', type=str, location='args', choices=('pending', 'paid', 'overdue'), help="Status must be one of pending, paid, overdue.")
+fee_filter_args.add_argument('semester', type=str, location='args')
+fee_filter_args.add_argument('fee_type', type=str, location='args')
+fee_filter_args.add_argument('student_id', type=int, location='args', help="Student ID must be an integer.")
+fee_filter_args.add_argument('paid_from', type=fee_date, location='args', help="paid_from must be a date.")
+fee_filter_args.add_argument('paid_before', type=fee_date, location='args', help="paid_before must be a date.")
+fee_filter_args.add_argument('sort', type=str, location='args', default='id')
+
+# Columns fees can be sorted on, prefix with '-' for descending
+fee_sort_columns = {
+    'id': FeeModel.id,
+    'student_id': FeeModel.student_id,
+    'amount': FeeModel.amount,
+    'payment_date': FeeModel.payment_date,
+    'status': FeeModel.status,
+    'semester': FeeModel.semester,
+    'fee_type': FeeModel.fee_type
+}
+
+def fee_sort_order(sort):
+    """Turn ?sort=status,-payment_date into a keyset order ending in id."""
+    order = []
+    for name in sort.split(','):
+        name = name.strip()
+        descending = name.startswith('-')
+        column = fee_sort_columns.get(name.lstrip('-'))
+        if column is None:
+            abort(400, message=f"Cannot sort fees by '{name}'.")
+        order.append((column, descending))
+    if order[-1][0] is not FeeModel.id:
+        order.append((FeeModel.id, False))
+    return order
+
+def filter_fees(query, args):
+    """Apply the fee_filter_args filters that were given to query."""
+    for name in ('status', 'semester', 'fee_type', 'student_id'):
+        if args[name] is not None:
+            query = query.filter(fee_sort_columns[name] == args[name])
+    if args['paid_from'] is not None:
+        query = query.filter(FeeModel.payment_date >= args['paid_from'])
+    if args['paid_before'] is not None:
+        query = query.filter(FeeModel.payment_date < args['paid_before'])
+    return query
+
+def balance_totals(fees, billed, paid, pending, overdue):
+    """Output form of fee_balances totals."""
+    # amounts are summed incrementally as floats, so round off the drift
+    return {'fees': fees, 'billed': round(billed, 2), 'paid': round(paid, 2), 'pending': round(pending, 2),
+            'overdue': round(overdue, 2), 'outstanding': round(pending + overdue, 2)}
+
 # Response Fields
 fee_fields = {
     'id': fields.Integer,
@@ -23,9 +91,9 @@ fee_fields = {
     'semester': fields.String,
     'fee_type': fields.String
 }
+fee_serializer = Serializer(fee_fields)
 
 class Fees(Resource):
-    @marshal_with(fee_fields)
     def get(self):
         """
         Get all fees
@@ -34,6 +102,64 @@ class Fees(Resource):
           - Fees
         summary: Retrieve all fees
         description: This endpoint retrieves all fees from the system.
+        parameters:
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+          - in: query
+            name: status
+            type: string
+            enum: [pending, paid, overdue]
+            required: false
+            description: Only return fees with this status
+          - in: query
+            name: semester
+            type: string
+            required: false
+            description: Only return fees for this semester
+          - in: query
+            name: fee_type
+            type: string
+            required: false
+            description: Only return fees of this type
+          - in: query
+            name: student_id
+            type: integer
+            required: false
+            description: Only return fees belonging to this student
+          - in: query
+            name: paid_from
+            type: string
+            format: date-time
+            required: false
+            description: Only return fees paid on or after this date
+          - in: query
+            name: paid_before
+            type: string
+            format: date-time
+            required: false
+            description: Only return fees paid before this date
+          - in: query
+            name: sort
+            type: string
+            required: false
+            default: id
+            description: Comma separated sort keys, prefix with '-' for descending (e.g. status,-payment_date)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+          - application/json
+          - application/x-ndjson
         responses:
           200:
             description: List of all fees retrieved successfully
@@ -74,12 +200,23 @@ class Fees(Resource):
                   type: string
                   description: Error message indicating that fees were not found.
         """
-        fees = FeeModel.query.all()
+        args = fee_filter_args.parse_args()
+        query = filter_fees(FeeModel.query, args)
+        serializer = fieldset(fee_serializer)
+        etag, last_modified = collection_validators(FeeModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = fee_sort_order(args['sort'])
+        query = load_fields(query, serializer.fields, *[column for column, _ in order])
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        fees, headers = paginate(query, order)
         if not fees:
             abort(404, message='Fees not found.')
-        return fees
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(fees), 200, headers
 
-    @marshal_with(fee_fields)
+    @marshal_with(fee_serializer)
     def post(self):
         """
         Create a new fee
@@ -157,19 +294,11 @@ class Fees(Resource):
         """
         args = fee_args.parse_args()
 
-        # Parse payment_date manually
-        payment_date = None
-        if args.payment_date:
-            try:
-                payment_date = datetime.fromisoformat(args.payment_date)
-            except ValueError:
-                abort(400, message="Invalid date format.")
-
         try:
             fee = FeeModel(
                 student_id=args.student_id,
                 amount=args.amount,
-                payment_date=payment_date,
+                payment_date=args.payment_date,
                 status=args.status,
                 semester=args.semester,
                 fee_type=args.fee_type
@@ -181,8 +310,300 @@ class Fees(Resource):
             db.session.rollback()
             abort(400, message=f"Error: Could not create fee. {str(e)}")
 
+class FeesBulk(Resource):
+    # Create many fees at once
+    def post(self):
+        """
+        Create fees in bulk
+        ---
+        tags:
+          - Fees
+        summary: Create many fees in a single request
+        description: Takes a JSON array of fees in the same shape as a single create. Every item is validated first; if any item is invalid nothing is created and the errors are listed by index. Otherwise all items are inserted in one transaction.
+        parameters:
+          - in: body
+            name: body
+            required: true
+            schema:
+              type: array
+              items:
+                type: object
+        responses:
+          201:
+            description: Fees created successfully
+            schema:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                    description: Position of the item in the request array
+                  id:
+                    type: integer
+                    description: The unique identifier of the created fee
+          400:
+            description: Bad request, one or more items are invalid. Nothing was created.
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Summary of the failure.
+                errors:
+                  type: array
+                  description: Errors of each invalid item, by index.
+                  items:
+                    type: object
+          413:
+            description: Too many items, the limit is BULK_MAX_ITEMS.
+        """
+        return bulk_create(FeeModel, fee_args, references={'student_id': StudentModel}), 201
+
+class FeesImport(Resource):
+    # Import a fee schedule from a CSV file
+    def post(self):
+        """
+        Import fees from a CSV file
+        ---
+        tags:
+          - Fees
+        summary: Import fees from a CSV file
+        description: Accepts a CSV file either as the raw request body (Content-Type text/csv) or as the "file" field of a multipart upload. The header row names the columns, which are the same as the fields of a single create (student_id, amount, fee_type, payment_date, status, semester). Rows are read and written in batches, each committed on its own; invalid rows are skipped and reported by line number.
+        consumes:
+          - text/csv
+          - multipart/form-data
+        parameters:
+          - in: formData
+            name: file
+            type: file
+            required: false
+            description: The CSV file, when uploading as multipart/form-data
+        responses:
+          201:
+            description: Rows were imported
+            schema:
+              type: object
+              properties:
+                imported:
+                  type: integer
+                  description: Number of rows inserted
+                failed:
+                  type: integer
+                  description: Number of rows skipped because they are invalid
+                errors:
+                  type: array
+                  description: Errors of the skipped rows, by line number (capped at CSV_IMPORT_MAX_ERRORS)
+                  items:
+                    type: object
+                errors_truncated:
+                  type: boolean
+                  description: Whether some errors were left out of the report
+          400:
+            description: Missing file or columns, no row could be imported, or a line that is not UTF-8 or not CSV stopped the import
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating why nothing, or not everything, was imported.
+                line:
+                  type: integer
+                  description: The line that stopped the import
+                imported:
+                  type: integer
+                  description: Rows before that line that were already imported
+        """
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                abort(400, message='Missing file field in the upload.')
+            stream = upload.stream
+        else:
+            stream = request.stream
+        report = import_csv(FeeModel, fee_args, stream, references={'student_id': StudentModel})
+        if not report['imported']:
+            return dict(report, message='No rows were imported.'), 400
+        return report, 201
+
+class StudentFees(Resource):
+    # Fees of one student
+    def get(self, id):
+        """
+        Get the fees of a student
+        ---
+        tags:
+          - Fees
+        summary: Retrieve the fees of a student
+        description: Lists the student's fees with the same filters and sort keys as /fees, read through the index on student_id and payment_date.
+        parameters:
+          - in: path
+            name: id
+            type: integer
+            required: true
+            description: The unique identifier of the student
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+          - in: query
+            name: status
+            type: string
+            enum: [pending, paid, overdue]
+            required: false
+            description: Only return fees with this status
+          - in: query
+            name: semester
+            type: string
+            required: false
+            description: Only return fees for this semester
+          - in: query
+            name: fee_type
+            type: string
+            required: false
+            description: Only return fees of this type
+          - in: query
+            name: sort
+            type: string
+            required: false
+            default: id
+            description: Comma separated sort keys, prefix with '-' for descending (e.g. -payment_date)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,amount)
+        responses:
+          200:
+            description: The student's fees, empty if the student has none
+            schema:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    description: The unique identifier of the fee
+                  student_id:
+                    type: integer
+                    description: The ID of the student associated with the fee
+                  amount:
+                    type: number
+                    format: float
+                    description: The amount of the fee
+                  payment_date:
+                    type: string
+                    format: date-time
+                    description: The date when the fee was paid
+                  status:
+                    type: string
+                    description: The status of the fee (e.g., pending, paid)
+                  semester:
+                    type: string
+                    description: The semester for which the fee is applicable
+                  fee_type:
+                    type: string
+                    description: The type of fee (e.g., tuition, library)
+          404:
+            description: Student not found
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating that the student was not found.
+        """
+        args = fee_filter_args.parse_args()
+        args['student_id'] = id
+        query = filter_fees(FeeModel.query, args)
+        serializer = fieldset(fee_serializer)
+        order = fee_sort_order(args['sort'])
+        query = load_fields(query, serializer.fields, *[column for column, _ in order])
+        fees, headers = paginate(query, order)
+        # only an empty page needs to tell a missing student from one without fees
+        if not fees and not db.session.query(StudentModel.id).filter_by(id=id).first():
+            abort(404, message='Student not found')
+        return serializer.dump(fees), 200, headers
+
+class StudentBalance(Resource):
+    # What a student owes, per semester
+    def get(self, id):
+        """
+        Get the fee balance of a student
+        ---
+        tags:
+          - Fees
+        summary: Retrieve a student's fee totals per semester
+        description: Reads the fee_balances summary table, which is kept up to date in the same transaction as every fee write, so the cost does not grow with the number of fees. Outstanding is pending plus overdue.
+        parameters:
+          - in: path
+            name: id
+            type: integer
+            required: true
+            description: The unique identifier of the student
+        responses:
+          200:
+            description: The student's balance, with no semesters if the student has no fees
+            schema:
+              type: object
+              properties:
+                student_id:
+                  type: integer
+                  description: The unique identifier of the student
+                semesters:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      semester:
+                        type: string
+                        description: The semester (null for fees without one)
+                      fees:
+                        type: integer
+                        description: Number of fees
+                      billed:
+                        type: number
+                        description: Sum of all fees
+                      paid:
+                        type: number
+                        description: Sum of paid fees
+                      pending:
+                        type: number
+                        description: Sum of pending fees
+                      overdue:
+                        type: number
+                        description: Sum of overdue fees
+                      outstanding:
+                        type: number
+                        description: Sum of pending and overdue fees
+                totals:
+                  type: object
+                  description: The same sums over every semester
+          404:
+            description: Student not found
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  description: Error message indicating that the student was not found.
+        """
+        rows = FeeBalanceModel.query.filter_by(student_id=id).order_by(FeeBalanceModel.semester).all()
+        if not rows and not db.session.query(StudentModel.id).filter_by(id=id).first():
+            abort(404, message='Student not found')
+        amounts = [(row.fee_count, row.billed, row.paid, row.pending, row.overdue) for row in rows]
+        semesters = [dict(semester=row.semester or None, **balance_totals(*amount))
+                     for row, amount in zip(rows, amounts)]
+        totals = balance_totals(*[sum(column) for column in zip(*amounts)] if amounts else [0] * 5)
+        return {'student_id': id, 'semesters': semesters, 'totals': totals}, 200
+
 class Fee(Resource):
-    @marshal_with(fee_fields)
     def get(self, id):
         """
         Get a fee by id
@@ -197,6 +618,11 @@ class Fee(Resource):
             type: integer
             required: true
             description: The unique identifier of the fee to retrieve
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
         responses:
             200:
                 description: Fee retrieved successfully
@@ -226,6 +652,8 @@ class Fee(Resource):
                     fee_type:
                     type: string
                     description: The type of fee (e.g., tuition, library)
+            304:
+                description: Not modified, the ETag sent in If-None-Match is still current
             404:
                 description: Fee not found
                 schema:
@@ -235,12 +663,16 @@ class Fee(Resource):
                     type: string
                     description: Error message indicating that the fee was not found.
             """
-        fee = FeeModel.query.filter_by(id=id).first()
+        serializer = fieldset(fee_serializer)
+        fee = load_fields(FeeModel.query, serializer.fields).filter_by(id=id).first()
         if not fee:
             abort(404, message='Fee not found')
-        return fee
+        etag = variant_etag(entity_etag(fee))
+        if fresh(etag):
+            return not_modified(etag)
+        return serializer.dump(fee), 200, etag_headers(etag)
     
-    @marshal_with(fee_fields)
+    @marshal_with(fee_serializer)
     def patch(self, id):
         """
         Update a fee by id
@@ -312,6 +744,8 @@ class Fee(Resource):
                 fee_type:
                   type: string
                   description: The type of fee (e.g., tuition, library)
+          412:
+            description: The ETag sent in If-Match is no longer current
           404:
             description: Fee not found
             schema:
@@ -333,6 +767,7 @@ class Fee(Resource):
         fee = FeeModel.query.filter_by(id=id).first()
         if not fee:
             abort(404, message='Fee not found')
+        check_if_match(entity_etag(fee))
         try:
             fee.student_id = args['student_id']
             fee.amount = args['amount']
@@ -341,12 +776,12 @@ class Fee(Resource):
             fee.semester = args['semester']
             fee.fee_type = args['fee_type']
             db.session.commit()
-            return fee, 200
+            return fee, 200, etag_headers(entity_etag(fee))
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"Error .could not update a fee {str(e)}")
         
-    @marshal_with(fee_fields)
+    @marshal_with(fee_serializer)
     def delete(self, id):
         """
         Delete a fee by id
@@ -364,6 +799,8 @@ class Fee(Resource):
         responses:
             204:
                 description: Fee deleted successfully
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Fee not found
                 schema:
@@ -384,6 +821,7 @@ class Fee(Resource):
         fee = FeeModel.query.filter_by(id=id).first()
         if not fee:
             abort(404, message='Fee not found')
+        check_if_match(entity_etag(fee))
         try:
             db.session.delete(fee)
             db.session.commit()
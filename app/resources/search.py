@@ -0,0 +1,74 @@
+from flask_restful import Resource, reqparse, abort
+from app.pagination import paginate
+from app.search import KINDS, terms, search_query, hit
+
+
+search_args = reqparse.RequestParser()
+search_args.add_argument('q', type=str, location='args', required=True, help="q is required")
+search_args.add_argument('type', type=str, location='args', choices=KINDS, help="type must be one of student, teacher, course")
+
+
+class Search(Resource):
+    def get(self):
+        """
+        Search students, teachers and courses
+        ---
+        tags:
+          - Search
+        summary: Full-text search over students, teachers and courses
+        description: Every word of q must match the start of a word in a name, email, student ID, department, course name or course code. Hits are ranked with bm25, matches in names first. On databases without the SQLite FTS5 index the words are matched anywhere with LIKE instead and hits are not ranked.
+        parameters:
+          - in: query
+            name: q
+            type: string
+            required: true
+            description: The words to search for (e.g. jan smi)
+          - in: query
+            name: type
+            type: string
+            enum: [student, teacher, course]
+            required: false
+            description: Only return hits of this type
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of hits to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        responses:
+          200:
+            description: The hits, best first; empty if nothing matched
+            schema:
+              type: array
+              items:
+                type: object
+                properties:
+                  type:
+                    type: string
+                    description: student, teacher or course
+                  id:
+                    type: integer
+                    description: The unique identifier of the student, teacher or course
+                  name:
+                    type: string
+                    description: The full name of the person, or the name of the course
+                  detail:
+                    type: string
+                    description: The other indexed fields (email and student ID, email and department, or course code)
+                  rank:
+                    type: number
+                    description: bm25 score, lower is better (null without the FTS5 index)
+          400:
+            description: q is missing or has no letters or digits
+        """
+        args = search_args.parse_args()
+        words = terms(args['q'])
+        if not words:
+            abort(400, message='q must contain at least one letter or digit.')
+        query, order = search_query(words, args['type'])
+        hits, headers = paginate(query, order)
+        return [hit(row) for row in hits], 200, headers
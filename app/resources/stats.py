@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+from flask_restful import Resource
+from app.stats import stats
+
+
+class Stats(Resource):
+    def get(self):
+        """
+        Get dashboard statistics
+        ---
+        tags:
+          - Stats
+        summary: Retrieve headline numbers for the admin dashboard
+        description: Served from a snapshot that a background thread recomputes every STATS_REFRESH_INTERVAL seconds, or sooner after STATS_REFRESH_WRITES committed writes. The response says how old the snapshot is and how many writes it does not reflect yet.
+        responses:
+          200:
+            description: The latest statistics snapshot
+            schema:
+              type: object
+              properties:
+                students:
+                  type: integer
+                  description: Number of students
+                teachers:
+                  type: integer
+                  description: Number of teachers
+                courses:
+                  type: integer
+                  description: Number of courses
+                enrollments:
+                  type: object
+                  description: Total number of enrollments and the number per status
+                active_enrollments_by_course:
+                  type: array
+                  description: Courses with active enrollments, most first, with course_id, code, name and active
+                  items:
+                    type: object
+                fees_outstanding:
+                  type: object
+                  description: Sum of pending and overdue fees, in total and by fee_type and semester
+                generated_at:
+                  type: string
+                  format: date-time
+                  description: When the snapshot was computed
+                age:
+                  type: number
+                  description: Seconds since the snapshot was computed
+                pending_writes:
+                  type: integer
+                  description: Rows written since the snapshot was computed
+        """
+        data, generated_at, pending_writes = stats.get()
+        age = (datetime.now(timezone.utc) - generated_at).total_seconds()
+        return dict(data, generated_at=generated_at.isoformat(), age=round(age, 3),
+                    pending_writes=pending_writes), 200
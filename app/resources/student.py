@@ -1,6 +1,13 @@
-from flask_restful import Resource, reqparse, fields, marshal_with, abort
-from app.models import StudentModel
+from flask_restful import Resource, reqparse, fields, abort
+from app.models import StudentModel, EnrollmentModel, CourseModel
 from app.extension import db
+from app.pagination import paginate
+from app.bulk import bulk_create
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.cache import cached_entity
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
 from dateutil.parser import parse as date_parse
 
 
@@ -25,11 +32,11 @@ student_fields = {
     'date_of_birth': fields.DateTime,
     'enrollment_date': fields.DateTime
 }
+student_serializer = Serializer(student_fields)
 
 # Resource for all students
 class Students(Resource):
     # Get all students
-    @marshal_with(student_fields)
     def get(self):
         """
         Get all students
@@ -38,6 +45,25 @@ class Students(Resource):
             - Students
         summary: Retrieve all students
         description: This endpoint retrieves all students from the system.
+        parameters:
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+            - application/json
+            - application/x-ndjson
         responses:
             200:
                 description: List of all students retrieved successfully
@@ -78,13 +104,22 @@ class Students(Resource):
                             type: string
                             description: Error message indicating that students were not found.
         """
-        students = StudentModel.query.all()
+        serializer = fieldset(student_serializer)
+        etag, last_modified = collection_validators(StudentModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(StudentModel.id, False)]
+        query = load_fields(StudentModel.query, serializer.fields)
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        students, headers = paginate(query, order)
         if not students:
             abort(404, message='Students not found')
-        return students
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(students), 200, headers
 
     # Create a student
-    @marshal_with(student_fields)
+    @marshal_with(student_serializer)
     def post(self):
         """
         Create a new student
@@ -137,9 +172,139 @@ class Students(Resource):
         db.session.commit()
         return student, 201
 
+class StudentsBulk(Resource):
+    # Create many students at once
+    def post(self):
+        """
+        Create students in bulk
+        ---
+        tags:
+            - Students
+        summary: Create many students in a single request
+        description: Takes a JSON array of students in the same shape as a single create. Every item is validated first; if any item is invalid nothing is created and the errors are listed by index. Otherwise all items are inserted in one transaction.
+        parameters:
+            - in: body
+              name: body
+              required: true
+              schema:
+                  type: array
+                  items:
+                      type: object
+        responses:
+            201:
+                description: Students created successfully
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            index:
+                                type: integer
+                                description: Position of the item in the request array
+                            id:
+                                type: integer
+                                description: The unique identifier of the created student
+            400:
+                description: Bad request, one or more items are invalid. Nothing was created.
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Summary of the failure.
+                        errors:
+                            type: array
+                            description: Errors of each invalid item, by index.
+                            items:
+                                type: object
+            413:
+                description: Too many items, the limit is BULK_MAX_ITEMS.
+        """
+        return bulk_create(StudentModel, student_args, unique=('student_id', 'email')), 201
+
 # Specific student, edit and delete a student
+class CourseStudents(Resource):
+    # Students enrolled in one course
+    def get(self, id):
+        """
+        Get the students of a course
+        ---
+        tags:
+            - Students
+        summary: Retrieve the students enrolled in a course
+        description: Lists the students with an enrollment in the course, read with one join of enrolments and students per page.
+        parameters:
+            - in: path
+              name: id
+              type: integer
+              required: true
+              description: The unique identifier of the course
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
+        responses:
+            200:
+                description: The students enrolled in the course, empty if there are none
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            id:
+                                type: integer
+                                description: The unique identifier of the student
+                            first_name:
+                                type: string
+                                description: The first name of the student
+                            last_name:
+                                type: string
+                                description: The last name of the student
+                            student_id:
+                                type: string
+                                description: The student ID of the student
+                            email:
+                                type: string
+                                description: The email address of the student
+                            date_of_birth:
+                                type: string
+                                format: date-time
+                                description: The date of birth of the student
+                            enrollment_date:
+                                type: string
+                                format: date-time
+                                description: The enrollment date of the student
+            404:
+                description: Course not found
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Error message indicating that the course was not found
+        """
+        serializer = fieldset(student_serializer)
+        order = [(StudentModel.id, False)]
+        # one enrollment per student and course, so the join never repeats a student
+        query = StudentModel.query.join(EnrollmentModel).filter(EnrollmentModel.course_id == id)
+        students, headers = paginate(load_fields(query, serializer.fields), order)
+        # only an empty page needs to tell a missing course from one without students
+        if not students and not db.session.query(CourseModel.id).filter_by(id=id).first():
+            abort(404, message='Course not found')
+        return serializer.dump(students), 200, headers
+
 class Student(Resource):
-    @marshal_with(student_fields)
     def get(self, id):
         """
         Get a specific student by ID
@@ -154,6 +319,11 @@ class Student(Resource):
               type: integer
               required: true
               description: The unique identifier of the student to retrieve.
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
         responses:
             200:
                 description: Student retrieved successfully
@@ -183,6 +353,8 @@ class Student(Resource):
                             type: string
                             format: date-time
                             description: The enrollment date of the student
+            304:
+                description: Not modified, the ETag sent in If-None-Match is still current
             404:
                 description: Student not found
                 schema:
@@ -192,12 +364,17 @@ class Student(Resource):
                             type: string
                             description: Error message indicating that the student was not found.
         """
-        student = StudentModel.query.filter_by(id=id).first()
-        if not student:
+        serializer = fieldset(student_serializer)
+        cached = cached_entity(StudentModel, id, student_serializer)
+        if cached is None:
             abort(404, message='Student not found')
-        return student, 200
+        data, etag = cached
+        etag = variant_etag(etag)
+        if fresh(etag):
+            return not_modified(etag)
+        return {key: data[key] for key in serializer.fields}, 200, etag_headers(etag)
 
-    @marshal_with(student_fields)
+    @marshal_with(student_serializer)
     def put(self, id):
         """
         Update a specific student by ID
@@ -241,6 +418,8 @@ class Student(Resource):
                             type: string
                             format: date-time
                             description: The enrollment date of the student
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Student not found
                 schema:
@@ -254,6 +433,7 @@ class Student(Resource):
         student = StudentModel.query.filter_by(id=id).first()
         if not student:
             abort(404, message='Student not found')
+        check_if_match(entity_etag(student))
         # for key, value in args.items():
         #     setattr(student, key, value)
         student.first_name = args['first_name']
@@ -263,10 +443,10 @@ class Student(Resource):
         student.date_of_birth = args['date_of_birth']
         student.enrollment_date = args['enrollment_date']
         db.session.commit()
-        return student, 200
+        return student, 200, etag_headers(entity_etag(student))
     
     # Delete a student
-    @marshal_with(student_fields)
+    @marshal_with(student_serializer)
     def delete(self, id):
         """
         Delete a specific student by ID
@@ -284,6 +464,8 @@ class Student(Resource):
         responses:
             204:
                 description: Student deleted successfully
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Student not found
                 schema:
@@ -296,6 +478,7 @@ class Student(Resource):
         student = StudentModel.query.filter_by(id=id).first()
         if not student:
             abort(404, message='Student not found')
+        check_if_match(entity_etag(student))
         db.session.delete(student)
         db.session.commit()
         return '', 204
\ No newline at end of file
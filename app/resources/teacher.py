@@ -1,6 +1,13 @@
-from flask_restful import Resource, marshal_with, fields, reqparse, abort
+from flask_restful import Resource, fields, reqparse, abort
 from app.models.teacher import TeacherModel
 from app.extension import db
+from app.pagination import paginate
+from app.bulk import bulk_create
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.cache import cached_entity
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
 
 
 teacher_args = reqparse.RequestParser()
@@ -9,7 +16,6 @@ teacher_args.add_argument('last_name', type=str, required=True, help="Last name
 teacher_args.add_argument('email', type=str, required=True, help="Email is required")
 teacher_args.add_argument('phone', type=str)
 teacher_args.add_argument('department', type=str)
-teacher_args.add_argument('credits', type=int, help="Credits are required")
 
 teacher_fields = {
     'id': fields.String,
@@ -19,11 +25,22 @@ teacher_fields = {
     'phone': fields.String,
     'department': fields.String,
     'credits': fields.Integer,
+    'course_count': fields.Integer,
     'hire_date': fields.DateTime
 }
+teacher_serializer = Serializer(teacher_fields)
+
+workload_fields = {
+    'id': fields.Integer,
+    'first_name': fields.String,
+    'last_name': fields.String,
+    'department': fields.String,
+    'credits': fields.Integer,
+    'course_count': fields.Integer
+}
+workload_serializer = Serializer(workload_fields)
 
 class Teachers(Resource):
-    @marshal_with(teacher_fields)
     def get(self):
         """
         Get all teachers
@@ -32,6 +49,25 @@ class Teachers(Resource):
             - Teachers
         summary: Retrieve all teachers
         description: This endpoint retrieves all teachers from the system.
+        parameters:
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+            - application/json
+            - application/x-ndjson
         responses:
             200:
                 description: List of all teachers retrieved successfully
@@ -60,7 +96,10 @@ class Teachers(Resource):
                                 description: The department of the teacher
                             credits:
                                 type: integer
-                                description: The credits assigned to the teacher
+                                description: Total credits of the courses taught by the teacher
+                            course_count:
+                                type: integer
+                                description: Number of courses taught by the teacher
                             hire_date:
                                 type: string
                                 format: date-time
@@ -74,12 +113,21 @@ class Teachers(Resource):
                             type: string
                             description: Error message indicating that no teachers were found.
         """
-        teachers = TeacherModel.query.all()
+        serializer = fieldset(teacher_serializer)
+        etag, last_modified = collection_validators(TeacherModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(TeacherModel.id, False)]
+        query = load_fields(TeacherModel.query, serializer.fields)
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        teachers, headers = paginate(query, order)
         if not teachers:
             abort(404, message="Teachers not found")
-        return teachers
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(teachers), 200, headers
 
-    @marshal_with(teacher_fields)
+    @marshal_with(teacher_serializer)
     def post(self):
         """
         Create a new teacher
@@ -112,9 +160,6 @@ class Teachers(Resource):
                     department:
                         type: string
                         description: The department of the teacher (optional)
-                    credits:
-                        type: integer
-                        description: The credits assigned to the teacher (optional)
         responses:
             201:
                 description: Teacher created successfully
@@ -141,7 +186,10 @@ class Teachers(Resource):
                             description: The department of the created teacher
                         credits:
                             type: integer
-                            description: The credits assigned to the created teacher
+                            description: Total credits of the courses taught by the created teacher
+                        course_count:
+                            type: integer
+                            description: Number of courses taught by the created teacher
                         hire_date:
                             type: string
                             format: date-time
@@ -162,8 +210,7 @@ class Teachers(Resource):
                 last_name=args['last_name'],
                 email=args['email'],
                 phone=args['phone'],
-                department=args['department'],
-                credits=args['credits']
+                department=args['department']
             )
             db.session.add(new_teacher)
             db.session.commit()
@@ -175,8 +222,113 @@ class Teachers(Resource):
 
             #specific teacher,edit and delete a teacher
 
+class TeachersBulk(Resource):
+    # Create many teachers at once
+    def post(self):
+        """
+        Create teachers in bulk
+        ---
+        tags:
+            - Teachers
+        summary: Create many teachers in a single request
+        description: Takes a JSON array of teachers in the same shape as a single create. Every item is validated first; if any item is invalid nothing is created and the errors are listed by index. Otherwise all items are inserted in one transaction.
+        parameters:
+            - in: body
+              name: body
+              required: true
+              schema:
+                  type: array
+                  items:
+                      type: object
+        responses:
+            201:
+                description: Teachers created successfully
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            index:
+                                type: integer
+                                description: Position of the item in the request array
+                            id:
+                                type: integer
+                                description: The unique identifier of the created teacher
+            400:
+                description: Bad request, one or more items are invalid. Nothing was created.
+                schema:
+                    type: object
+                    properties:
+                        message:
+                            type: string
+                            description: Summary of the failure.
+                        errors:
+                            type: array
+                            description: Errors of each invalid item, by index.
+                            items:
+                                type: object
+            413:
+                description: Too many items, the limit is BULK_MAX_ITEMS.
+        """
+        return bulk_create(TeacherModel, teacher_args), 201
+
+class TeachersWorkload(Resource):
+    # Teachers by credit load, heaviest first
+    def get(self):
+        """
+        Get the teaching workload report
+        ---
+        tags:
+            - Teachers
+        summary: Retrieve teachers sorted by credit load
+        description: Lists teachers by the total credits of the courses they teach, heaviest first, with their course count. Both totals are kept on the teacher row as courses are created, reassigned or deleted, so the report is one indexed scan of teachers.
+        parameters:
+            - in: query
+              name: after
+              type: string
+              required: false
+              description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+            - in: query
+              name: limit
+              type: integer
+              required: false
+              description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        responses:
+            200:
+                description: A page of the workload report
+                schema:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            id:
+                                type: integer
+                                description: The unique identifier of the teacher
+                            first_name:
+                                type: string
+                                description: The first name of the teacher
+                            last_name:
+                                type: string
+                                description: The last name of the teacher
+                            department:
+                                type: string
+                                description: The department of the teacher
+                            credits:
+                                type: integer
+                                description: Total credits of the courses taught by the teacher
+                            course_count:
+                                type: integer
+                                description: Number of courses taught by the teacher
+        """
+        etag, last_modified = collection_validators(TeacherModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(TeacherModel.credits, True), (TeacherModel.id, False)]
+        teachers, headers = paginate(load_fields(TeacherModel.query, workload_fields), order)
+        headers.update(etag_headers(etag, last_modified))
+        return workload_serializer.dump(teachers), 200, headers
+
 class Teacher(Resource):
-    @marshal_with(teacher_fields)
     def get(self, id):
         """
         Get a specific teacher by ID
@@ -191,6 +343,11 @@ class Teacher(Resource):
               type: integer
               required: true
               description: The unique identifier of the teacher to retrieve
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma separated list of fields to return (e.g. id,email)
         responses:
             200:
                 description: Teacher details retrieved successfully
@@ -217,11 +374,16 @@ class Teacher(Resource):
                             description: The department of the teacher
                         credits:
                             type: integer
-                            description: The credits assigned to the teacher
+                            description: Total credits of the courses taught by the teacher
+                        course_count:
+                            type: integer
+                            description: Number of courses taught by the teacher
                         hire_date:
                             type: string
                             format: date-time
                             description: The hire date of the teacher
+            304:
+                description: Not modified, the ETag sent in If-None-Match is still current
             404:
                 description: Teacher not found
                 schema:
@@ -231,12 +393,17 @@ class Teacher(Resource):
                             type: string
                             description: Error message indicating that the teacher was not found.
         """
-        teacher = TeacherModel.query.filter_by(id=id).first()
-        if not teacher:
+        serializer = fieldset(teacher_serializer)
+        cached = cached_entity(TeacherModel, id, teacher_serializer)
+        if cached is None:
             abort(404, message='Teacher not found')
-        return teacher
+        data, etag = cached
+        etag = variant_etag(etag)
+        if fresh(etag):
+            return not_modified(etag)
+        return {key: data[key] for key in serializer.fields}, 200, etag_headers(etag)
     
-    @marshal_with(teacher_fields)
+    @marshal_with(teacher_serializer)
     def patch(self, id):
         """
         Update a specific teacher by ID
@@ -273,9 +440,6 @@ class Teacher(Resource):
                     department:
                         type: string
                         description: The department of the teacher (optional)
-                    credits:
-                        type: integer
-                        description: The credits assigned to the teacher (optional)
         responses:
             200:
                 description: Teacher updated successfully
@@ -302,11 +466,16 @@ class Teacher(Resource):
                             description: The department of the updated teacher
                         credits:
                             type: integer
-                            description: The credits assigned to the updated teacher
+                            description: Total credits of the courses taught by the updated teacher
+                        course_count:
+                            type: integer
+                            description: Number of courses taught by the updated teacher
                         hire_date:
                             type: string
                             format: date-time
                             description: The hire date of the updated teacher
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Teacher not found
                 schema:
@@ -320,15 +489,15 @@ class Teacher(Resource):
         teacher = TeacherModel.query.filter_by(id=id).first()
         if not teacher:
             abort(404, message='Teacher not found')
+        check_if_match(entity_etag(teacher))
         teacher.first_name = args['first_name']
         teacher.last_name = args['last_name']
         teacher.email = args['email']
         teacher.phone = args['phone']
         teacher.department = args['department']
-        teacher.credits = args['credits']
         db.session.commit()
-        return teacher
-    @marshal_with(teacher_fields)
+        return teacher, 200, etag_headers(entity_etag(teacher))
+    @marshal_with(teacher_serializer)
     def delete(self, id):
         """
         Delete a specific teacher by ID
@@ -346,6 +515,8 @@ class Teacher(Resource):
         responses:
             204:
                 description: Teacher deleted successfully
+            412:
+                description: The ETag sent in If-Match is no longer current
             404:
                 description: Teacher not found
                 schema:
@@ -358,6 +529,7 @@ class Teacher(Resource):
         teacher = TeacherModel.query.filter_by(id=id).first()
         if not teacher:
             abort(404, message='Teacher not found')
+        check_if_match(entity_etag(teacher))
         db.session.delete(teacher)
         db.session.commit()
         return '', 204
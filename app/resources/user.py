@@ -1,7 +1,15 @@
 
-from flask_restful import Resource, marshal_with, fields, reqparse, abort
+from flask_restful import Resource, fields, reqparse, abort
 from app.extension import db
+from app.pagination import paginate
+from app.serializers import Serializer, marshal_with
+from app.fieldsets import fieldset, load_fields
+from app.conditional import entity_etag, variant_etag, collection_validators, etag_headers, fresh, not_modified, check_if_match
+from app.streaming import wants_ndjson, stream_ndjson
 from app.models.user import UserModel
+from app.passwords import passwords
+from app.auth import tokens, token_required
+from flask import current_app, g
 
 
 
@@ -11,19 +19,30 @@ user_args.add_argument('username', type=str, required=True, help="Username canno
 user_args.add_argument('email', type=str, required=True, help="Email cannot be blank" )
 user_args.add_argument('password', type=str, required=True, help="Password cannot be blank" )
 
+login_args = reqparse.RequestParser()
+login_args.add_argument('username', type=str, required=True, help="Username cannot be blank" )
+login_args.add_argument('password', type=str, required=True, help="Password cannot be blank" )
+
  # output field
 user_fields = {
     'id': fields.Integer,
     'username': fields.String,
     'email': fields.String,
-    'password': fields.String,
-
 }
+user_serializer = Serializer(user_fields)
+
+
+def check_owner(user):
+    # users may change themselves, admins anyone
+    if g.token['uid'] != user.id and 'admin' not in g.token['roles']:
+        abort(403, message="You can only change your own account")
 
  # resource for all users
 class Users(Resource):
+    # listing users needs a token, signing up does not
+    method_decorators = {'get': [token_required()]}
+
     #Get all users
-    @marshal_with(user_fields)
     def get(self):
         """
         Get all users
@@ -32,6 +51,27 @@ class Users(Resource):
           - Users
         summary: Retrieve all users
         description: This endpoint retrieves all users from the system.
+        parameters:
+          - in: query
+            name: after
+            type: string
+            required: false
+            description: Opaque cursor taken from the X-Next-Cursor header of the previous page
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            description: Maximum number of items to return (defaults to PAGE_SIZE, capped at MAX_PAGE_SIZE)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
+        produces:
+          - application/json
+          - application/x-ndjson
+        security:
+          - Bearer: []
         responses:
           200:
             description: List of all users retrieved successfully
@@ -53,6 +93,8 @@ class Users(Resource):
                 type: string
                 format: date-time
                 description: The creation date of the user
+          401:
+            description: Missing, invalid, expired or revoked bearer token
           404:
             description: Users not found
             schema:
@@ -62,14 +104,23 @@ class Users(Resource):
               type: string
               description: users not found
         """
-        users = UserModel.query.all()
+        serializer = fieldset(user_serializer)
+        etag, last_modified = collection_validators(UserModel)
+        if fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+        order = [(UserModel.id, False)]
+        query = load_fields(UserModel.query, serializer.fields)
+        if wants_ndjson():
+            return stream_ndjson(query, order, serializer, etag_headers(etag, last_modified))
+        users, headers = paginate(query, order)
         if not users:
             abort(404, message='users not found')
-        return users 
+        headers.update(etag_headers(etag, last_modified))
+        return serializer.dump(users), 200, headers
     
     #create a user
 
-    @marshal_with(user_fields)
+    @marshal_with(user_serializer)
     def post(self):
         """
         Create a new user
@@ -120,23 +171,25 @@ class Users(Resource):
                 message:
                   type: string
                   description: Error message detailing the issue
+          503:
+            description: The password worker pool is saturated, retry shortly
         """
         args = user_args.parse_args()
+        # outside the try, so a saturated hashing pool stays a 503
+        password = passwords.hash(args['password'])
         try:
-            new_user = UserModel(username=args['username'], email=args['email'], password=args['password'])
+            new_user = UserModel(username=args['username'], email=args['email'], password=password)
             db.session.add(new_user)
             db.session.commit()
-            users = UserModel.query.all()
-            return users, 201
+            return new_user, 201
         except Exception as e:
             db.session.rollback()
             abort(400, message=f"there was an error creating user: {e}")
-        users = UserModel.query.all()
-        return users, 201
 
 
 class user(Resource):
-    @marshal_with(user_fields)
+    method_decorators = [token_required()]
+
     def get(self, id):
         """
         Get a user by id
@@ -151,6 +204,13 @@ class user(Resource):
             type: integer
             required: true
             description: The unique identifier of the user to retrieve
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma separated list of fields to return (e.g. id,email)
+        security:
+          - Bearer: []
         responses:
           200:
             description: User retrieved successfully
@@ -166,6 +226,10 @@ class user(Resource):
                 email:
                   type: string
                   description: The email address of the user
+          304:
+            description: Not modified, the ETag sent in If-None-Match is still current
+          401:
+            description: Missing, invalid, expired or revoked bearer token
           404:
             description: User not found
             schema:
@@ -178,12 +242,16 @@ class user(Resource):
          # get a user by id
         if not id:
             abort(400, message="id is required")
-        user = UserModel.query.filter_by(id=id).first()
+        serializer = fieldset(user_serializer)
+        user = load_fields(UserModel.query, serializer.fields).filter_by(id=id).first()
         if not user:
             abort(404, message="user not found")
-        return user, 200
+        etag = variant_etag(entity_etag(user))
+        if fresh(etag):
+            return not_modified(etag)
+        return serializer.dump(user), 200, etag_headers(etag)
     
-    @marshal_with(user_fields)
+    @marshal_with(user_serializer)
     def patch(self, id):
         """
         Update a user by id
@@ -214,6 +282,8 @@ class user(Resource):
                 password:
                   type: string
                   description: The password for the user account
+        security:
+            - Bearer: []
         responses:
             200:
                 description: User updated successfully
@@ -229,6 +299,12 @@ class user(Resource):
                     email:
                       type: string
                       description: The email address of the user
+            412:
+                description: The ETag sent in If-Match is no longer current
+            401:
+                description: Missing, invalid, expired or revoked bearer token
+            403:
+                description: The token belongs to another user and lacks the admin role
             404:
                 description: User not found
                 schema:
@@ -242,13 +318,15 @@ class user(Resource):
         user = UserModel.query.filter_by(id=id).first()
         if not user:
             abort(404, message="No user with that id")
+        check_owner(user)
+        check_if_match(entity_etag(user))
         user.username = args['username']
         user.email = args['email']
-        user.password = args['password']
+        user.password = passwords.hash(args['password'])
         db.session.commit()
-        return user, 200
+        return user, 200, etag_headers(entity_etag(user))
     
-    @marshal_with(user_fields)
+    @marshal_with(user_serializer)
     def delete(self, id):
         """
         Delete a user by id
@@ -263,6 +341,8 @@ class user(Resource):
             type: integer
             required: true
             description: The unique identifier of the user to delete
+        security:
+            - Bearer: []
         responses:
 
             200:
@@ -270,6 +350,12 @@ class user(Resource):
                 schema:
                 type: string
                 example: "user deleted successfully"
+            412:
+                description: The ETag sent in If-Match is no longer current
+            401:
+                description: Missing, invalid, expired or revoked bearer token
+            403:
+                description: The token belongs to another user and lacks the admin role
             404:
                 description: User not found
                 schema:
@@ -282,31 +368,94 @@ class user(Resource):
         user = UserModel.query.filter_by(id=id).first()
         if not user:
              abort(404, message="cannot delete a non existing user")
+        check_owner(user)
+        check_if_match(entity_etag(user))
         db.session.delete(user)
         db.session.commit()
         return "user deleted succesfully"
 
-        
-
-        
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
 
+class Login(Resource):
+    def post(self):
+        """
+        Log in with a username and password
+        ---
+        tags:
+          - Users
+        summary: Check a user's credentials
+        description: Verifies the password on the password worker pool and returns a signed access token. Passwords stored in plain text or hashed with other parameters than PASSWORD_METHOD are rehashed on a successful login.
+        parameters:
+          - in: body
+            name: credentials
+            required: true
+            schema:
+              type: object
+              properties:
+                username:
+                  type: string
+                  description: The username of the user
+                password:
+                  type: string
+                  description: The password of the user
+        responses:
+          200:
+            description: Credentials are valid
+            schema:
+              type: object
+              properties:
+                id:
+                  type: integer
+                  description: The unique identifier of the user
+                username:
+                  type: string
+                  description: The username of the user
+                email:
+                  type: string
+                  description: The email address of the user
+                token:
+                  type: string
+                  description: Access token, sent back in the Authorization header as Bearer <token>
+                expires_in:
+                  type: integer
+                  description: Seconds until the token expires (TOKEN_MAX_AGE)
+          401:
+            description: Invalid username or password
+          503:
+            description: The password worker pool is saturated, retry shortly
+        """
+        args = login_args.parse_args()
+        user = UserModel.query.filter_by(username=args['username']).first()
+        if user is None:
+            passwords.verify(passwords.dummy(), args['password'])
+            abort(401, message="Invalid username or password")
+        matches, rehashed = passwords.verify(user.password, args['password'])
+        if not matches:
+            abort(401, message="Invalid username or password")
+        if rehashed:
+            user.password = rehashed
+            db.session.commit()
+        return dict(user_serializer.dump(user), token=tokens.issue(user),
+                    expires_in=current_app.config['TOKEN_MAX_AGE']), 200
 
 
+class Logout(Resource):
+    method_decorators = [token_required()]
 
+    def post(self):
+        """
+        Log out by revoking the bearer token
+        ---
+        tags:
+          - Users
+        summary: Revoke the bearer token of this request
+        description: The token is deny-listed until it expires. Other server processes stop accepting it within TOKEN_DENYLIST_REFRESH seconds.
+        security:
+          - Bearer: []
+        responses:
+          204:
+            description: Token revoked
+          401:
+            description: Missing, invalid, expired or revoked bearer token
+        """
+        tokens.revoke(g.token)
+        return '', 204
@@ -0,0 +1,172 @@
+import re
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Float, Integer, String, and_, column, event, func, literal, or_, table, text, union_all
+from app.extension import db
+from app.models import StudentModel, TeacherModel, CourseModel
+
+
+search_cli = AppGroup('search', help='Full-text search commands.')
+
+# rowid of an entry in the index = id * len(KINDS) + position of its kind,
+# so triggers can find an entry without an index on extra columns
+KINDS = ('student', 'teacher', 'course')
+
+# (kind, table, indexed name, indexed detail), as SQL over the table's row
+SOURCES = (
+    ('student', 'students', "{row}.first_name || ' ' || {row}.last_name", "{row}.email || ' ' || {row}.student_id"),
+    ('teacher', 'teachers', "{row}.first_name || ' ' || {row}.last_name", "{row}.email || ' ' || COALESCE({row}.department, '')"),
+    ('course', 'courses', "{row}.name", "{row}.code"),
+)
+WATCHED = {
+    'students': 'first_name, last_name, email, student_id',
+    'teachers': 'first_name, last_name, email, department',
+    'courses': 'name, code',
+}
+
+search_index = table('search_index', column('rowid', Integer), column('rank', Float),
+                     column('name', String), column('detail', String))
+
+
+def _rowid(kind, row):
+    return f'{row}.id * {len(KINDS)} + {KINDS.index(kind)}'
+
+
+def ddl():
+    """Statements creating the FTS5 index and the triggers keeping it in sync."""
+    statements = [
+        # prefix indexes make the name* queries the search endpoint sends cheap
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "name, detail, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        # matches in the name weigh ten times matches in the detail
+        "INSERT INTO search_index(search_index, rank) VALUES('rank', 'bm25(10.0, 1.0)')",
+    ]
+    for kind, source, name, detail in SOURCES:
+        rowid, new = _rowid(kind, 'new'), {'row': 'new'}
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS search_{source}_insert AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO search_index(rowid, name, detail) VALUES ({rowid}, {name.format(**new)}, {detail.format(**new)}); END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{source}_update AFTER UPDATE OF {WATCHED[source]} ON {source} BEGIN "
+            f"UPDATE search_index SET name = {name.format(**new)}, detail = {detail.format(**new)} WHERE rowid = {rowid}; END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{source}_delete AFTER DELETE ON {source} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old')}; END",
+        ]
+    return statements
+
+
+def rebuild(connection):
+    """Refill the index from the students, teachers and courses tables."""
+    connection.execute(text('DELETE FROM search_index'))
+    for kind, source, name, detail in SOURCES:
+        connection.execute(text(
+            f"INSERT INTO search_index(rowid, name, detail) SELECT {_rowid(kind, source)}, "
+            f"{name.format(row=source)}, {detail.format(row=source)} FROM {source}"))
+    connection.execute(text("INSERT INTO search_index(search_index) VALUES('optimize')"))
+    return connection.execute(text('SELECT COUNT(*) FROM search_index')).scalar()
+
+
+def include_name(name, type_, parent_names):
+    """Keep the index and its shadow tables out of Alembic autogenerate."""
+    return not (type_ == 'table' and name.startswith('search_index'))
+
+
+_available = {}
+
+
+def fts_available():
+    """Whether this database has the FTS5 search index."""
+    engine = db.engine
+    if engine.url not in _available:
+        _available[engine.url] = engine.dialect.name == 'sqlite' and db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")).first() is not None
+    return _available[engine.url]
+
+
+def terms(q):
+    """The words of a query string, as FTS5 and LIKE see them."""
+    return re.findall(r'\w+', q or '')
+
+
+def search_query(words, kind=None):
+    """(query, order) of the hits for words, for app.pagination.paginate.
+
+    With the FTS5 index every word is a prefix match and hits are ranked by
+    bm25. Elsewhere each word must appear somewhere in the entity's text
+    fields (LIKE, unranked), and hits come back in entity order.
+    """
+    kinds = [kind] if kind else KINDS
+    if fts_available():
+        match = ' '.join(f'"{word}"*' for word in words)
+        query = db.session.query(search_index.c.rowid, search_index.c.rank, search_index.c.name, search_index.c.detail)
+        query = query.filter(text('search_index MATCH :match').bindparams(match=match))
+        if kind:
+            query = query.filter(search_index.c.rowid % len(KINDS) == KINDS.index(kind))
+        return query, [(search_index.c.rank, False), (search_index.c.rowid, False)]
+
+    fields = {
+        'student': (StudentModel, StudentModel.first_name + ' ' + StudentModel.last_name,
+                    StudentModel.email + ' ' + StudentModel.student_id,
+                    (StudentModel.first_name, StudentModel.last_name, StudentModel.email, StudentModel.student_id)),
+        'teacher': (TeacherModel, TeacherModel.first_name + ' ' + TeacherModel.last_name,
+                    TeacherModel.email + ' ' + func.coalesce(TeacherModel.department, ''),
+                    (TeacherModel.first_name, TeacherModel.last_name, TeacherModel.email, TeacherModel.department)),
+        'course': (CourseModel, CourseModel.name, CourseModel.code, (CourseModel.name, CourseModel.code)),
+    }
+    selects = []
+    for name in kinds:
+        model, title, detail, columns = fields[name]
+        selects.append(
+            db.select((model.id * len(KINDS) + KINDS.index(name)).label('rowid'), literal(None, Float).label('rank'),
+                      title.label('name'), detail.label('detail'))
+            .where(and_(*[or_(*[c.ilike(f'%{word}%') for c in columns]) for word in words])))
+    hits = union_all(*selects).subquery('hits')
+    return db.session.query(hits), [(hits.c.rowid, False)]
+
+
+def hit(row):
+    return {
+        'type': KINDS[row.rowid % len(KINDS)],
+        'id': row.rowid // len(KINDS),
+        'name': row.name,
+        'detail': row.detail,
+        'rank': row.rank,
+    }
+
+
+def _missing(connection):
+    """Whether the index or any of its triggers is absent from the database."""
+    names = {'search_index'} | {f'search_{source}_{action}' for _, source, _, _ in SOURCES
+                                for action in ('insert', 'update', 'delete')}
+    present = set(connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE 'search%'")).scalars())
+    return not names <= present
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_index(target, connection, **kw):
+    # create_all (run.py at startup, tests); migrations create it themselves.
+    # An index already in place with all its triggers is up to date, so
+    # restarts skip the reindex.
+    if connection.dialect.name == 'sqlite' and _missing(connection):
+        for statement in ddl():
+            connection.execute(text(statement))
+        rebuild(connection)
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Reindex every student, teacher and course.
+
+    Also recreates the index and its triggers if they are missing, e.g.
+    after a batch migration on SQLite copied one of the tables without them.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('Full-text search needs SQLite FTS5; /api/search falls back to LIKE queries here.')
+        return
+    with db.engine.begin() as connection:
+        for statement in ddl():
+            connection.execute(text(statement))
+        count = rebuild(connection)
+    _available.clear()
+    click.echo(f'Indexed {count} entries.')
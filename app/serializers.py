@@ -0,0 +1,114 @@
+from functools import wraps
+
+from flask_restful import fields, marshal
+from flask_restful.fields import is_indexable_but_not_string
+from flask_restful.utils import unpack
+from werkzeug.wrappers import Response as ResponseBase
+
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def _rfc822(dt):
+    """Same output as fields.DateTime's RFC 822 format, without the
+    timestamp round trip through email.utils.formatdate."""
+    t = dt.utctimetuple()
+    return '%s, %02d %s %04d %02d:%02d:%02d -0000' % (
+        _DAYS[t.tm_wday], t.tm_mday, _MONTHS[t.tm_mon - 1], t.tm_year,
+        t.tm_hour, t.tm_min, t.tm_sec)
+
+
+# field class -> expression formatting a non-None value v
+_FORMATS = {
+    fields.Raw: '{v}',
+    fields.String: '_str({v})',
+    fields.Integer: '_int({v})',
+    fields.Float: '_float({v})',
+    fields.Boolean: '_bool({v})',
+}
+
+
+def _compile(output_fields):
+    """Generate one function that marshals an object the way
+    flask_restful.marshal(obj, output_fields) does."""
+    namespace = {'_str': str, '_int': int, '_float': float, '_bool': bool,
+                 '_rfc822': _rfc822, '_marshal': marshal}
+    body, items = [], []
+    for index, (key, field) in enumerate(output_fields.items()):
+        value = f'v{index}'
+        namespace[f'_f{index}'] = field
+        if isinstance(field, dict):
+            items.append(f'{key!r}: _marshal(obj, _f{index})')
+            continue
+        if isinstance(field, type):
+            field = namespace[f'_f{index}'] = field()
+        attribute = key if field.attribute is None else field.attribute
+        fmt = _FORMATS.get(type(field))
+        if type(field) is fields.DateTime:
+            fmt = {'rfc822': '_rfc822({v})', 'iso8601': '{v}.isoformat()'}.get(field.dt_format)
+        if fmt is None or not isinstance(attribute, str) or '.' in attribute:
+            items.append(f'{key!r}: _f{index}.output({key!r}, obj)')
+            continue
+        namespace[f'_d{index}'] = field.default
+        body.append(f'    {value} = getattr(obj, {attribute!r}, None)')
+        items.append(f'{key!r}: _d{index} if {value} is None else {fmt.format(v=value)}')
+    source = '\n'.join(['def dump(obj):'] + body + ['    return {' + ', '.join(items) + '}'])
+    exec(compile(source, f'<serializer {", ".join(output_fields)}>', 'exec'), namespace)
+    return namespace['dump']
+
+
+class Serializer(object):
+    """A fields dict compiled into a single marshalling function.
+
+    Output is identical to flask_restful.marshal with the same fields, but
+    each row costs one generated function call instead of a dict build plus
+    a field object dispatch per key. Dicts and other indexable objects, and
+    anything the fast path raises on, go through marshal itself.
+    """
+    def __init__(self, output_fields):
+        self.fields = output_fields
+        self._dump = _compile(output_fields)
+        self._subsets = {}
+
+    def only(self, names):
+        """Return a serializer for the subset of fields named in names."""
+        key = frozenset(names)
+        if key not in self._subsets:
+            self._subsets[key] = Serializer({k: v for k, v in self.fields.items() if k in key})
+        return self._subsets[key]
+
+    def dump_one(self, obj):
+        if is_indexable_but_not_string(obj):
+            return marshal(obj, self.fields)
+        try:
+            return self._dump(obj)
+        except Exception:
+            return marshal(obj, self.fields)
+
+    def dump(self, data):
+        if isinstance(data, (list, tuple)):
+            return [self.dump_one(obj) for obj in data]
+        return self.dump_one(data)
+
+
+class marshal_with(object):
+    """Drop-in for flask_restful.marshal_with that takes a Serializer.
+
+    Responses returned by the wrapped method (e.g. a 304) pass through
+    untouched.
+    """
+    def __init__(self, serializer):
+        self.serializer = serializer
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            resp = f(*args, **kwargs)
+            if isinstance(resp, ResponseBase):
+                return resp
+            if isinstance(resp, tuple):
+                data, code, headers = unpack(resp)
+                return self.serializer.dump(data), code, headers
+            return self.serializer.dump(resp)
+        return wrapper
@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime, timezone
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, func
+from app.extension import db
+from app.models import StudentModel, TeacherModel, CourseModel, EnrollmentModel, FeeModel
+
+
+# enrollments created through the API default to 'active', through the model to 'enrolled'
+ACTIVE_ENROLLMENT = ('active', 'enrolled')
+OUTSTANDING_FEE = ('pending', 'overdue')
+
+
+class StatsSnapshot(object):
+    """Dashboard statistics recomputed by a background thread.
+
+    The thread rebuilds the snapshot every STATS_REFRESH_INTERVAL seconds,
+    or sooner once STATS_REFRESH_WRITES rows have been written by committed
+    transactions since the last one. Requests only read the latest
+    snapshot, so they never wait on the GROUP BY queries except for the
+    very first one in a process. The thread is started by that first
+    request rather than by init_app, so CLI commands do not spawn it.
+    """
+    def __init__(self, app=None):
+        self._snapshot = None
+        self._writes = 0
+        self._threshold = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('STATS_REFRESH_INTERVAL', 60)
+        app.config.setdefault('STATS_REFRESH_WRITES', 500)
+
+    def get(self):
+        """(data, generated_at, pending_writes) of the latest snapshot."""
+        if self._thread is None:
+            self._start(current_app._get_current_object())
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot + (self._writes,)
+
+    def record(self, writes):
+        """Count rows written by a committed transaction."""
+        with self._lock:
+            self._writes += writes
+            if self._threshold is not None and self._writes >= self._threshold:
+                self._wake.set()
+
+    def refresh(self):
+        with self._lock:
+            counted = self._writes
+        snapshot = (compute(), datetime.now(timezone.utc))
+        with self._lock:
+            # writes committed while the queries ran may not be in the snapshot yet
+            self._writes -= counted
+            self._snapshot = snapshot
+        return snapshot
+
+    def _start(self, app):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._threshold = app.config['STATS_REFRESH_WRITES']
+            self._thread = threading.Thread(target=self._run, args=(app,), name='stats-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self, app):
+        while True:
+            self._wake.wait(app.config['STATS_REFRESH_INTERVAL'])
+            self._wake.clear()
+            # a fresh app context per round, so the session and its read
+            # transaction are closed between refreshes
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception:
+                    app.logger.exception('Refreshing the stats snapshot failed')
+
+
+def compute():
+    """The dashboard numbers, one set-based query per figure."""
+    def count(model):
+        return db.session.scalar(db.select(func.count()).select_from(model))
+
+    # a PATCH can null an enrollment's status; it reads as the column default
+    status = func.coalesce(EnrollmentModel.status, 'enrolled')
+    by_status = dict(db.session.execute(db.select(status, func.count()).group_by(status)).all())
+    active = db.session.execute(
+        db.select(CourseModel.id, CourseModel.code, CourseModel.name, func.count(EnrollmentModel.id).label('active'))
+        .join(EnrollmentModel, EnrollmentModel.course_id == CourseModel.id)
+        .where(status.in_(ACTIVE_ENROLLMENT))
+        .group_by(CourseModel.id, CourseModel.code, CourseModel.name)
+        .order_by(func.count(EnrollmentModel.id).desc(), CourseModel.id)).all()
+    outstanding = db.session.execute(
+        db.select(FeeModel.fee_type, FeeModel.semester, func.count(), func.sum(FeeModel.amount))
+        .where(func.coalesce(FeeModel.status, 'pending').in_(OUTSTANDING_FEE))
+        .group_by(FeeModel.fee_type, FeeModel.semester)
+        .order_by(FeeModel.fee_type, FeeModel.semester)).all()
+    return {
+        'students': count(StudentModel),
+        'teachers': count(TeacherModel),
+        'courses': count(CourseModel),
+        'enrollments': {'total': sum(by_status.values()), 'by_status': by_status},
+        'active_enrollments_by_course': [
+            {'course_id': id, 'code': code, 'name': name, 'active': n} for id, code, name, n in active],
+        'fees_outstanding': {
+            'total': round(sum(amount for *_, amount in outstanding), 2),
+            'by_type_and_semester': [
+                {'fee_type': fee_type, 'semester': semester, 'count': n, 'amount': round(amount, 2)}
+                for fee_type, semester, n, amount in outstanding],
+        },
+    }
+
+
+stats = StatsSnapshot()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _count_flushed(session, flush_context):
+    written = sum(1 for _ in chain(session.new, session.dirty, session.deleted))
+    session.info['stats_writes'] = session.info.get('stats_writes', 0) + written
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _count_bulk(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        params = state.parameters
+        written = len(params) if isinstance(params, list) else 1
+        state.session.info['stats_writes'] = state.session.info.get('stats_writes', 0) + written
+
+
+@event.listens_for(db.session, 'after_commit')
+def _record_committed(session):
+    written = session.info.pop('stats_writes', 0)
+    if written:
+        stats.record(written)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('stats_writes', None)
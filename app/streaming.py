@@ -0,0 +1,41 @@
+from flask import Response, current_app, request, stream_with_context
+from app.pagination import check_limit, keyset, pagination_args
+from app.representations import dumps
+
+
+NDJSON = 'application/x-ndjson'
+
+
+def wants_ndjson():
+    """True when the client's Accept header prefers NDJSON over JSON."""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def output_ndjson(data, code, headers=None):
+    """Makes a Flask response with one JSON document per line"""
+    rows = data if isinstance(data, list) else [data]
+    resp = Response(b''.join(dumps(row) + b'\n' for row in rows), code, mimetype=NDJSON)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def stream_ndjson(query, order, serializer, headers=None):
+    """Stream every row of query as NDJSON without materialising the result.
+
+    Rows are pulled from the database in STREAM_BATCH_SIZE chunks and each
+    one is marshalled and written as soon as it arrives, so memory stays flat
+    and the first line goes out before the query has finished. ?after= is
+    honoured and ?limit= is applied uncapped, since nothing is buffered.
+    """
+    args = pagination_args.parse_args()
+    limit = check_limit(args['limit'])
+    query = keyset(query, order, args['after'])
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.yield_per(current_app.config['STREAM_BATCH_SIZE'])
+
+    def generate():
+        for row in rows:
+            yield dumps(serializer.dump_one(row)) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON, headers=headers)
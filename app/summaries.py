@@ -0,0 +1,78 @@
+from sqlalchemy import event, inspect
+from app.extension import db
+
+
+# model -> (fields, contribute, apply, rebuild) of each summary table derived from it
+_summaries = {}
+
+
+def maintain(model, fields, contribute, apply, rebuild):
+    """Keep a summary table of model's rows up to date as the rows change.
+
+    contribute(deltas, *values, sign) adds (sign 1) or takes away (sign -1)
+    the share of one row, given the values of its fields, to a dict of
+    deltas; apply(session, deltas) writes them. Flushed objects contribute
+    with their old and new values. Bulk inserts contribute their parameter
+    rows, while bulk UPDATE and DELETE statements, whose rows are unknown,
+    call rebuild(session) to recompute the whole table instead.
+    """
+    _summaries.setdefault(model, []).append((fields, contribute, apply, rebuild))
+
+
+def previous(obj, fields):
+    """The values of fields obj had before the changes being flushed."""
+    state = inspect(obj)
+    values = []
+    for name in fields:
+        history = state.attrs[name].history
+        values.append((history.deleted or history.unchanged or history.added or [None])[0])
+    return values
+
+
+def _current(obj, fields):
+    return [getattr(obj, name) for name in fields]
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_flushed(session, flush_context):
+    for model, summaries in _summaries.items():
+        for fields, contribute, apply, _ in summaries:
+            deltas = {}
+            for obj in session.new:
+                if isinstance(obj, model):
+                    contribute(deltas, *_current(obj, fields), 1)
+            for obj in session.deleted:
+                if isinstance(obj, model):
+                    contribute(deltas, *previous(obj, fields), -1)
+            for obj in session.dirty:
+                if isinstance(obj, model) and session.is_modified(obj):
+                    contribute(deltas, *previous(obj, fields), -1)
+                    contribute(deltas, *_current(obj, fields), 1)
+            if deltas:
+                apply(session, deltas)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _track_bulk(state):
+    # bulk statements bypass the unit of work and so the flush hook above
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = state.statement.table.name
+    summaries = [summary for model, summaries in _summaries.items() if model.__tablename__ == table
+                 for summary in summaries]
+    if not summaries:
+        return
+    params = state.parameters
+    params = [params] if isinstance(params, dict) else params
+    result = state.invoke_statement()
+    for fields, contribute, apply, rebuild in summaries:
+        if state.is_insert and params:
+            deltas = {}
+            for row in params:
+                contribute(deltas, *[row.get(name) for name in fields], 1)
+            if deltas:
+                apply(state.session, deltas)
+        else:
+            # an UPDATE, DELETE or multi VALUES insert could have touched any row
+            rebuild(state.session)
+    return result
@@ -0,0 +1,101 @@
+import hashlib
+import json
+
+from sqlalchemy import case, func, inspect
+from app.extension import db
+from app.cache import cached, entity_cache
+from app.models import StudentModel, CourseModel, EnrollmentModel
+
+
+def transcript_statement(student_id):
+    """One SELECT of a student's enrollments joined to their courses, with
+    per-semester and running credit totals computed by window functions.
+
+    Students are outer joined so a student without enrollments still comes
+    back as a single row of NULLs, and a missing student as no rows at all.
+    Attempted credits count every enrollment that was not dropped, earned
+    credits only completed ones. Enrollments without a semester sort last.
+    A NULL status reads as 'enrolled', as it does for rosters and stats.
+    """
+    status = func.coalesce(EnrollmentModel.status, 'enrolled')
+    attempted = case((status != 'dropped', CourseModel.credits), else_=0)
+    earned = case((status == 'completed', CourseModel.credits), else_=0)
+    by_semester = {'partition_by': EnrollmentModel.semester}
+    # the default frame runs up to the last row of the current semester
+    running = {'order_by': EnrollmentModel.semester.asc().nulls_last()}
+    return (
+        db.select(
+            EnrollmentModel.id, EnrollmentModel.semester, status.label('status'), EnrollmentModel.grade,
+            CourseModel.id.label('course_id'), CourseModel.code, CourseModel.name, CourseModel.credits,
+            func.sum(attempted).over(**by_semester).label('semester_attempted'),
+            func.sum(earned).over(**by_semester).label('semester_earned'),
+            func.sum(attempted).over(**running).label('cumulative_attempted'),
+            func.sum(earned).over(**running).label('cumulative_earned'),
+        )
+        .select_from(StudentModel)
+        .outerjoin(EnrollmentModel, EnrollmentModel.student_id == StudentModel.id)
+        .outerjoin(CourseModel, CourseModel.id == EnrollmentModel.course_id)
+        .where(StudentModel.id == student_id)
+        .order_by(EnrollmentModel.semester.asc().nulls_last(), CourseModel.code)
+    )
+
+
+def build_transcript(student_id):
+    """(data, etag) for a student's transcript, None when the student does not exist."""
+    rows = db.session.execute(transcript_statement(student_id)).all()
+    if not rows:
+        return None
+    semesters = []
+    for row in rows:
+        if row.id is None:
+            continue
+        if not semesters or semesters[-1]['semester'] != row.semester:
+            semesters.append({
+                'semester': row.semester,
+                'credits_attempted': row.semester_attempted,
+                'credits_earned': row.semester_earned,
+                'cumulative_attempted': row.cumulative_attempted,
+                'cumulative_earned': row.cumulative_earned,
+                'courses': [],
+            })
+        semesters[-1]['courses'].append({
+            'enrollment_id': row.id,
+            'course_id': row.course_id,
+            'code': row.code,
+            'name': row.name,
+            'credits': row.credits,
+            'status': row.status,
+            'grade': row.grade,
+        })
+    last = semesters[-1] if semesters else {'cumulative_attempted': 0, 'cumulative_earned': 0}
+    data = {
+        'student_id': student_id,
+        'semesters': semesters,
+        'credits_attempted': last['cumulative_attempted'],
+        'credits_earned': last['cumulative_earned'],
+    }
+    digest = hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return data, f'transcript-{student_id}-{digest}'
+
+
+def cached_transcript(student_id):
+    """build_transcript read through the entity cache."""
+    return cached(('transcript', student_id), lambda: build_transcript(student_id))
+
+
+def _enrollment_students(enrollment):
+    # a reassigned enrollment leaves its previous student's transcript stale too
+    history = inspect(enrollment).attrs.student_id.history
+    return {('transcript', id) for id in (*history.unchanged, *history.added, *history.deleted)
+            if id is not None}
+
+
+def _course_students(course):
+    # runs from after_flush, so a plain SELECT; only courses with enrollments cost anything
+    return {('transcript', id) for id in db.session.scalars(
+        db.select(EnrollmentModel.student_id).where(EnrollmentModel.course_id == course.id))}
+
+
+entity_cache.watch(EnrollmentModel, _enrollment_students, clear='transcript')
+entity_cache.watch(CourseModel, _course_students, clear='transcript')
+entity_cache.watch(StudentModel, lambda student: {('transcript', student.id)})
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from itertools import chain
+
+from sqlalchemy import event, insert, update
+from app.extension import db
+from app.models.table_version import TableVersionModel
+
+
+versions = TableVersionModel.__table__
+
+
+def touch(session, tables):
+    """Bump the change counter of each table in the session's transaction."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    connection = session.connection()
+    for table in sorted(tables):
+        updated = connection.execute(
+            update(versions).where(versions.c.table_name == table)
+            .values(version=versions.c.version + 1, updated_at=now)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(versions).values(table_name=table, version=1, updated_at=now))
+
+
+def table_watermark(model):
+    """(version, updated_at) of model's table; (0, None) before its first write."""
+    row = db.session.execute(
+        db.select(versions.c.version, versions.c.updated_at)
+        .where(versions.c.table_name == model.__tablename__)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _touch_flushed(session, flush_context):
+    changed = chain(session.new, session.deleted,
+                    (obj for obj in session.dirty if session.is_modified(obj)))
+    tables = {obj.__table__.name for obj in changed} - {versions.name}
+    if tables:
+        touch(session, tables)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _touch_bulk(state):
+    # ORM bulk INSERT/UPDATE/DELETE statements bypass the unit of work
+    if state.is_insert or state.is_update or state.is_delete:
+        touch(state.session, {state.statement.table.name})
@@ -0,0 +1,89 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.orm.util import identity_key
+from app.extension import db
+from app.models.course import CourseModel
+from app.models.teacher import TeacherModel
+from app.summaries import maintain
+from app.watermarks import touch
+
+
+workload_cli = AppGroup('workload', help='Teacher workload commands.')
+
+teachers = TeacherModel.__table__
+courses = CourseModel.__table__
+
+
+def _contribution(deltas, teacher_id, credits, sign):
+    """Add (or with sign -1 take away) one course's share of its teacher's load."""
+    if teacher_id is None:
+        return
+    totals = deltas.setdefault(teacher_id, [0, 0])
+    totals[0] += sign
+    totals[1] += sign * (credits or 0)
+
+
+def _changed(session, ids=None):
+    """Make a workload change visible like any other write to the teachers
+    it touched, or to every teacher when ids is None: bump the collection
+    watermark, drop the cached rows after commit and expire loaded copies."""
+    touch(session, {teachers.name})
+    if ids is None:
+        session.info.setdefault('entity_cache_tables', set()).add(teachers.name)
+        loaded = [obj for obj in session.identity_map.values() if isinstance(obj, TeacherModel)]
+    else:
+        session.info.setdefault('entity_cache_keys', set()).update((teachers.name, id) for id in ids)
+        loaded = [session.identity_map.get(identity_key(TeacherModel, id)) for id in ids]
+    for teacher in loaded:
+        if teacher is not None:
+            session.expire(teacher, ['credits', 'course_count', 'version_id'])
+
+
+def apply(session, deltas):
+    """Add deltas, a dict of teacher id -> (courses, credits), to the teachers table."""
+    rows = [{'teacher': id, 'courses': count, 'credits_delta': credits}
+            for id, (count, credits) in sorted(deltas.items()) if count or credits]
+    if not rows:
+        return
+    # one executemany; the version bump changes the teachers' ETags
+    session.connection().execute(
+        update(teachers).where(teachers.c.id == bindparam('teacher')).values(
+            course_count=teachers.c.course_count + bindparam('courses'),
+            credits=teachers.c.credits + bindparam('credits_delta'),
+            version_id=teachers.c.version_id + 1,
+        ), rows)
+    _changed(session, [row['teacher'] for row in rows])
+
+
+def rebuild(connection):
+    """Recompute every teacher's load from the courses table in one UPDATE.
+
+    Only teachers whose totals were wrong are written; their number is returned.
+    """
+    taught = courses.c.teacher_id == teachers.c.id
+    count = db.select(func.count()).where(taught).scalar_subquery()
+    credits = db.select(func.coalesce(func.sum(courses.c.credits), 0)).where(taught).scalar_subquery()
+    return connection.execute(
+        update(teachers)
+        .where(or_(teachers.c.course_count != count, teachers.c.credits != credits))
+        .values(course_count=count, credits=credits, version_id=teachers.c.version_id + 1)
+    ).rowcount
+
+
+def _rebuild(session):
+    if rebuild(session.connection()):
+        _changed(session)
+
+
+maintain(CourseModel, ('teacher_id', 'credits'), _contribution, apply, _rebuild)
+
+
+@workload_cli.command('rebuild')
+def rebuild_command():
+    """Recompute every teacher's credit load and course count from the courses table."""
+    count = rebuild(db.session.connection())
+    if count:
+        _changed(db.session)
+    db.session.commit()
+    click.echo(f'Corrected the workload of {count} teachers.')
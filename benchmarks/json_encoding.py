@@ -0,0 +1,37 @@
+"""Compare flask_restful's stdlib output_json encoding with app.representations.
+
+    python benchmarks/json_encoding.py [rows]
+
+Encodes a marshalled students list both ways and checks the decoded
+documents are equal.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import representations
+from app.resources.student import student_serializer
+from serializers import students
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = student_serializer.dump(students(n))
+    expected, before = timed(lambda: json.dumps(data) + "\n")
+    actual, after = timed(lambda: representations.dumps(data) + b"\n")
+    assert json.loads(expected) == json.loads(actual), 'decoded output differs'
+    encoder = 'orjson' if representations.orjson is not None else 'stdlib fallback'
+    print(f'{n} rows   json.dumps {before * 1e3:7.1f} ms   {encoder} {after * 1e3:7.1f} ms   {before / after:4.1f}x')
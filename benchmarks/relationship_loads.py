@@ -0,0 +1,109 @@
+"""Time relationship loads with and without the foreign key indexes.
+
+    python benchmarks/relationship_loads.py [enrollments]
+
+Builds a throwaway SQLite database from the models (1M enrollments by
+default, with students, courses, teachers and fees in proportion), then
+loads StudentModel.enrollments, StudentModel.fees, CourseModel.enrollments
+and TeacherModel.courses for a sample of parents, and looks teachers up by
+email, first with the indexes added for them dropped and then with them
+in place.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+from app.extension import db
+from app.models import StudentModel, TeacherModel, CourseModel, EnrollmentModel, FeeModel
+
+# the indexes under test; fees.student_id is covered by ix_fees_student_id_payment_date
+INDEXES = [index for table in (EnrollmentModel, CourseModel, TeacherModel)
+           for index in table.__table__.indexes]
+SAMPLE = 200
+
+
+def populate(engine, enrollments):
+    # enough courses that every enrollment can be a distinct (student, course) pair
+    students, courses, teachers = enrollments // 20, max(enrollments // 2000, 40), max(enrollments // 20000, 5)
+    with engine.begin() as connection:
+        connection.execute(insert(TeacherModel), [
+            {'id': i, 'first_name': f'T{i}', 'last_name': 'Teacher', 'email': f'teacher{i}@example.com'}
+            for i in range(1, teachers + 1)])
+        connection.execute(insert(CourseModel), [
+            {'id': i, 'code': f'C{i}', 'name': f'Course {i}', 'credits': 3, 'teacher_id': 1 + i % teachers}
+            for i in range(1, courses + 1)])
+        connection.execute(insert(StudentModel), [
+            {'id': i, 'first_name': f'S{i}', 'last_name': 'Student', 'student_id': f'ST{i:07d}',
+             'email': f'student{i}@example.com'}
+            for i in range(1, students + 1)])
+        # uq_enrolments_student_id_course_id is recreated after loading, so pairs must not repeat
+        pairs = random.sample(range(students * courses), enrollments)
+        for start in range(0, enrollments, 100000):
+            connection.execute(insert(EnrollmentModel), [
+                {'student_id': 1 + pair // courses, 'course_id': 1 + pair % courses,
+                 'status': random.choice(('enrolled', 'completed', 'dropped')),
+                 'enrollment_date': datetime(2025, 9, 1)}
+                for pair in pairs[start:start + 100000]])
+        connection.execute(insert(FeeModel), [
+            {'student_id': 1 + random.randrange(students), 'amount': 1500.0, 'fee_type': 'tuition',
+             'semester': '2025-1', 'status': 'pending', 'payment_date': datetime(2025, 9, 1)}
+            for _ in range(enrollments // 5)])
+    return students, courses, teachers
+
+
+def timed_loads(engine, students, courses, teachers):
+    rng = random.Random(42)
+    cases = {
+        'student.enrollments': (StudentModel, students, lambda s: s.enrollments),
+        'student.fees': (StudentModel, students, lambda s: s.fees),
+        'course.enrollments': (CourseModel, courses, lambda c: c.enrollments),
+        'teacher.courses': (TeacherModel, teachers, lambda t: t.courses),
+    }
+    results = {}
+    for name, (model, count, load) in cases.items():
+        ids = [1 + rng.randrange(count) for _ in range(SAMPLE)]
+        with Session(engine) as session:
+            parents = [session.get(model, id) for id in ids]
+            start = time.perf_counter()
+            for parent in parents:
+                load(parent)
+            results[name] = (time.perf_counter() - start) / SAMPLE
+    with Session(engine) as session:
+        emails = [f'teacher{1 + rng.randrange(teachers)}@example.com' for _ in range(SAMPLE)]
+        start = time.perf_counter()
+        for email in emails:
+            session.query(TeacherModel).filter_by(email=email).first()
+        results['teacher by email'] = (time.perf_counter() - start) / SAMPLE
+    return results
+
+
+if __name__ == '__main__':
+    enrollments = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db.metadata.create_all(engine)
+        for index in INDEXES:
+            index.drop(engine)
+        start = time.perf_counter()
+        counts = populate(engine, enrollments)
+        print(f'{enrollments} enrollments, {counts[0]} students, {counts[1]} courses, {counts[2]} teachers '
+              f'(loaded in {time.perf_counter() - start:.1f}s)')
+
+        before = timed_loads(engine, *counts)
+        for index in INDEXES:
+            index.create(engine)
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+        after = timed_loads(engine, *counts)
+
+        print(f"{'load':<22}{'no index':>12}{'indexed':>12}")
+        for name in before:
+            print(f'{name:<22}{before[name] * 1000:9.3f} ms{after[name] * 1000:9.3f} ms'
+                  f'{before[name] / after[name]:8.0f}x')
@@ -0,0 +1,53 @@
+"""Compare flask_restful.marshal with the compiled serializers.
+
+    python benchmarks/serializers.py [rows]
+
+Builds transient model instances (no database needed), checks the JSON
+produced both ways is byte-identical and prints the per-row cost.
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from json import dumps
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask_restful import marshal
+from app.models import StudentModel, FeeModel
+from app.resources.student import student_fields, student_serializer
+from app.resources.fee import fee_fields, fee_serializer
+
+
+def students(n):
+    return [StudentModel(id=i, first_name=f'First{i}', last_name=f'Last{i}', student_id=f'ST{i:06d}',
+                         email=f'student{i}@example.com', date_of_birth=None,
+                         enrollment_date=datetime(2024, 9, 1 + i % 28, 8, i % 60)) for i in range(n)]
+
+
+def fees(n):
+    return [FeeModel(id=i, student_id=i % 5000, amount=1500.0 + i % 100, fee_type='tuition',
+                     semester=f'2025-{i % 2 + 1}', status=('pending', 'paid', 'overdue')[i % 3],
+                     payment_date=datetime(2025, 1 + i % 12, 1 + i % 28)) for i in range(n)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def compare(name, rows, output_fields, serializer):
+    expected, before = timed(lambda: marshal(rows, output_fields))
+    actual, after = timed(lambda: serializer.dump(rows))
+    assert dumps(expected) == dumps(actual), f'{name}: output differs'
+    n = len(rows)
+    print(f'{name:<10} marshal {before / n * 1e6:6.2f} us/row   '
+          f'compiled {after / n * 1e6:6.2f} us/row   {before / after:4.1f}x   (output identical)')
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f'{n} rows')
+    compare('students', students(n), student_fields, student_serializer)
+    compare('fees', fees(n), fee_fields, fee_serializer)
@@ -5,4 +5,26 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///api.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv('SECRET_KEY')
-    API_URL = os.getenv('API_URL')
\ No newline at end of file
+    API_URL = os.getenv('API_URL')
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+    JSON_PRETTY = {'true': True, 'false': False}.get(os.getenv('JSON_PRETTY', '').lower())
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVELS = {'application/json': 6, 'application/x-ndjson': 5}
+    COMPRESS_CACHE_SIZE = int(os.getenv('COMPRESS_CACHE_SIZE', 32 * 1024 * 1024))
+    ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 1024))
+    ENTITY_CACHE_TTL = int(os.getenv('ENTITY_CACHE_TTL', 300))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 10000))
+    BULK_PAGE_SIZE = int(os.getenv('BULK_PAGE_SIZE', 500))
+    CSV_IMPORT_BATCH_SIZE = int(os.getenv('CSV_IMPORT_BATCH_SIZE', 1000))
+    CSV_IMPORT_MAX_ERRORS = int(os.getenv('CSV_IMPORT_MAX_ERRORS', 1000))
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 25))
+    PASSWORD_METHOD = os.getenv('PASSWORD_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_WORKERS = int(os.getenv('PASSWORD_WORKERS', os.cpu_count() or 1))
+    PASSWORD_QUEUE_SIZE = int(os.getenv('PASSWORD_QUEUE_SIZE', 16))
+    TOKEN_MAX_AGE = int(os.getenv('TOKEN_MAX_AGE', 3600))
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 4096))
+    TOKEN_DENYLIST_REFRESH = int(os.getenv('TOKEN_DENYLIST_REFRESH', 30))
+    STATS_REFRESH_INTERVAL = float(os.getenv('STATS_REFRESH_INTERVAL', 60))
+    STATS_REFRESH_WRITES = int(os.getenv('STATS_REFRESH_WRITES', 500))
@@ -0,0 +1,69 @@
+"""add search index
+
+Revision ID: ee6e535df360
+Revises: f02dbe78a287
+Create Date: 2026-10-18 16:41:44.948297
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ee6e535df360'
+down_revision = 'f02dbe78a287'
+branch_labels = None
+depends_on = None
+
+
+# (table, indexed name, indexed detail, watched columns), as SQL over the table's row;
+# an entry's rowid is id * 3 + the table's position here
+SOURCES = (
+    ('students', "{row}.first_name || ' ' || {row}.last_name", "{row}.email || ' ' || {row}.student_id",
+     'first_name, last_name, email, student_id'),
+    ('teachers', "{row}.first_name || ' ' || {row}.last_name", "{row}.email || ' ' || COALESCE({row}.department, '')",
+     'first_name, last_name, email, department'),
+    ('courses', '{row}.name', '{row}.code', 'name, code'),
+)
+
+
+def upgrade():
+    # FTS5 only exists on SQLite; elsewhere /api/search uses LIKE queries.
+    # Batch migrations on SQLite copy a table without its triggers, so later
+    # ones touching students, teachers or courses need `flask search rebuild`.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "name, detail, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    op.execute("INSERT INTO search_index(search_index, rank) VALUES('rank', 'bm25(10.0, 1.0)')")
+    for kind, (source, name, detail, columns) in enumerate(SOURCES):
+        new = {'row': 'new'}
+        op.execute(
+            f"CREATE TRIGGER search_{source}_insert AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO search_index(rowid, name, detail) "
+            f"VALUES (new.id * 3 + {kind}, {name.format(**new)}, {detail.format(**new)}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER search_{source}_update AFTER UPDATE OF {columns} ON {source} BEGIN "
+            f"UPDATE search_index SET name = {name.format(**new)}, detail = {detail.format(**new)} "
+            f"WHERE rowid = new.id * 3 + {kind}; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER search_{source}_delete AFTER DELETE ON {source} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 3 + {kind}; END"
+        )
+        op.execute(
+            f"INSERT INTO search_index(rowid, name, detail) SELECT {source}.id * 3 + {kind}, "
+            f"{name.format(row=source)}, {detail.format(row=source)} FROM {source}"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for source, *_ in SOURCES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS search_{source}_{action}')
+    op.execute('DROP TABLE IF EXISTS search_index')
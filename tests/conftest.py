@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import pytest
+
+# the app reads its config at import time
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ.setdefault('SECRET_KEY', 'test')
+
+from app import app as flask_app
+from app.extension import db, compress
+from app.cache import entity_cache
+from app.models import TeacherModel, CourseModel, StudentModel, EnrollmentModel
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    entity_cache.clear()
+    compress.cache.__init__()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def courses(app):
+    """Twenty courses taught by one teacher, the first with three enrolled students."""
+    teacher = TeacherModel(first_name='Ada', last_name='Lovelace', email='ada@example.com')
+    db.session.add(teacher)
+    db.session.flush()
+    courses = [CourseModel(code=f'C{i:02}', name=f'Course number {i}', credits=3, teacher_id=teacher.id)
+               for i in range(20)]
+    students = [StudentModel(first_name=f'Student{i}', last_name='Doe', student_id=f'S{i}', email=f's{i}@example.com')
+                for i in range(3)]
+    db.session.add_all(courses + students)
+    db.session.flush()
+    db.session.add_all([EnrollmentModel(student_id=s.id, course_id=courses[0].id, status='enrolled') for s in students])
+    db.session.commit()
+    return courses
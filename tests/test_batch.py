@@ -0,0 +1,24 @@
+def batch(client, *requests, atomic=False):
+    response = client.post('/api/batch', json={'requests': list(requests), 'atomic': atomic})
+    assert response.status_code == 200
+    return response.get_json()['responses']
+
+
+def test_sub_request_accept_encoding_is_ignored(client, courses):
+    first, second = batch(
+        client,
+        {'method': 'GET', 'path': '/api/courses', 'headers': {'Accept-Encoding': 'gzip'}},
+        {'method': 'GET', 'path': f'/api/courses/{courses[0].id}', 'headers': {'accept-encoding': 'br, gzip'}},
+    )
+    assert first['status'] == 200 and len(first['body']) == len(courses)
+    assert second['status'] == 200 and second['body']['code'] == courses[0].code
+
+
+def test_sub_request_that_rules_out_json_gets_a_406(client, courses):
+    ndjson, json_too = batch(
+        client,
+        {'method': 'GET', 'path': '/api/courses', 'headers': {'Accept': 'application/x-ndjson'}},
+        {'method': 'GET', 'path': '/api/courses', 'headers': {'Accept': 'application/x-ndjson, application/json;q=0.5'}},
+    )
+    assert ndjson['status'] == 406
+    assert json_too['status'] == 200 and len(json_too['body']) == len(courses)
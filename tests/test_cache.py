@@ -0,0 +1,21 @@
+from app.cache import cached, entity_cache
+
+
+def test_value_loaded_across_an_invalidation_is_not_kept(app):
+    def load():
+        # another request commits a change to the row while this one reads it
+        entity_cache.invalidate(('courses', 1))
+        return 'stale'
+
+    assert cached(('courses', 1), load) == 'stale'
+    assert cached(('courses', 1), lambda: 'fresh') == 'fresh'
+    assert cached(('courses', 1), lambda: 'later') == 'fresh'
+
+
+def test_table_clear_during_a_load_also_counts(app):
+    def load():
+        entity_cache.clear('courses')
+        return 'stale'
+
+    assert cached(('courses', 2), load) == 'stale'
+    assert entity_cache.get(('courses', 2)) is None
@@ -0,0 +1,33 @@
+import gzip
+import json
+
+import pytest
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture(autouse=True)
+def compress_everything(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'COMPRESS_MIN_SIZE', 0)
+
+
+def body(response):
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return json.loads(gzip.decompress(response.data))
+
+
+def test_gzip_pages_are_not_served_from_each_others_cache(client, courses):
+    first = client.get('/api/courses?limit=10', headers=GZIP)
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get(f'/api/courses?limit=10&after={cursor}', headers=GZIP)
+    assert [c['id'] for c in body(first)] == [c.id for c in courses[:10]]
+    assert [c['id'] for c in body(second)] == [c.id for c in courses[10:]]
+
+
+def test_gzip_fieldsets_are_not_served_from_each_others_cache(client, courses):
+    narrow = client.get('/api/courses?fields=id', headers=GZIP)
+    full = client.get('/api/courses', headers=GZIP)
+    plain = client.get('/api/courses')
+    assert body(narrow)[0] == {'id': courses[0].id}
+    assert set(body(full)[0]) == {'id', 'code', 'name', 'credits', 'teacher_id'}
+    assert plain.get_json() == body(full)
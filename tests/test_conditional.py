@@ -0,0 +1,33 @@
+def test_fieldset_has_its_own_etag(client, courses):
+    url = f'/api/courses/{courses[0].id}'
+    narrow = client.get(url + '?fields=id,name')
+    full = client.get(url)
+    assert narrow.headers['ETag'] != full.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': narrow.headers['ETag']}).status_code == 200
+    assert client.get(url + '?fields=name,id', headers={'If-None-Match': narrow.headers['ETag']}).status_code == 304
+
+
+def test_if_match_accepts_a_fieldset_etag(client, courses):
+    url = f'/api/courses/{courses[1].id}'
+    etag = client.get(url + '?fields=name').headers['ETag']
+    response = client.delete(url, headers={'If-Match': etag})
+    assert response.status_code == 204
+    assert client.get(url).status_code == 404
+
+
+def test_pages_and_filters_have_their_own_etag(client, courses):
+    first = client.get('/api/courses?limit=10')
+    second = client.get(f"/api/courses?limit=10&after={first.headers['X-Next-Cursor']}")
+    narrow = client.get('/api/courses?limit=10&fields=id')
+    assert len({first.headers['ETag'], second.headers['ETag'], narrow.headers['ETag']}) == 3
+    assert client.get(second.request.full_path, headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+    assert client.get('/api/courses?limit=10', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_if_modified_since_alone_does_not_hide_a_write_in_the_same_second(client, courses):
+    last_modified = client.get('/api/courses').headers['Last-Modified']
+    client.patch(f'/api/courses/{courses[1].id}', json={
+        'code': 'C01', 'name': 'Renamed', 'credits': 4, 'teacher_id': courses[1].teacher_id})
+    response = client.get('/api/courses', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert response.get_json()[1]['name'] == 'Renamed'
@@ -0,0 +1,26 @@
+from app.extension import db
+from app.models import FeeModel
+
+
+def post_csv(client, data):
+    return client.post('/api/fees/import', data=data, content_type='text/csv')
+
+
+def test_non_utf8_line_stops_the_import_and_names_the_line(app, client, courses, monkeypatch):
+    monkeypatch.setitem(app.config, 'CSV_IMPORT_BATCH_SIZE', 2)
+    rows = [b'student_id,amount,fee_type']
+    rows += [b'1,100,tuition'] * 4
+    rows += [b'1,100,caf\xe9 \xff', b'1,100,tuition']
+    response = post_csv(client, b'\r\n'.join(rows) + b'\r\n')
+    assert response.status_code == 400
+    assert response.get_json()['line'] == 6
+    assert response.get_json()['imported'] == 4
+    assert db.session.scalar(db.select(db.func.count()).select_from(FeeModel)) == 4
+
+
+def test_invalid_csv_is_a_400(client, courses):
+    # longer than csv.field_size_limit()
+    response = post_csv(client, b'student_id,amount,fee_type\r\n1,100,tuition\r\n1,100,' + b'x' * 200000 + b'\r\n')
+    assert response.status_code == 400
+    assert response.get_json()['line'] == 3
+    assert response.get_json()['imported'] == 0
@@ -0,0 +1,12 @@
+def test_roster_counts_an_enrollment_whose_status_was_nulled(client, courses):
+    roster = client.get(f'/api/courses/{courses[0].id}/roster').get_json()
+    enrollment = roster['students'][0]
+    response = client.patch(f"/api/enrollments/{enrollment['id']}", json={
+        'student_id': enrollment['student']['id'], 'course_id': courses[0].id, 'status': None})
+    assert response.status_code == 200
+
+    response = client.get(f'/api/courses/{courses[0].id}/roster')
+    assert response.status_code == 200
+    assert response.get_json()['counts'] == {'enrolled': 3}
+    assert response.get_json()['total'] == 3
+    assert len(client.get(f'/api/courses/{courses[0].id}/roster?status=enrolled').get_json()['students']) == 3
@@ -0,0 +1,24 @@
+from sqlalchemy import text
+
+from app.extension import db
+
+
+def count(statement):
+    return db.session.execute(text(statement)).scalar()
+
+
+def test_create_all_leaves_an_existing_index_alone(app, courses):
+    indexed = count('SELECT COUNT(*) FROM search_index')
+    db.session.execute(text('DELETE FROM search_index WHERE rowid = (SELECT MIN(rowid) FROM search_index)'))
+    db.session.commit()
+    db.create_all()
+    assert count('SELECT COUNT(*) FROM search_index') == indexed - 1
+
+
+def test_create_all_rebuilds_when_a_trigger_is_missing(app, courses):
+    db.session.execute(text('DROP TRIGGER search_courses_update'))
+    db.session.execute(text('DELETE FROM search_index'))
+    db.session.commit()
+    db.create_all()
+    assert count("SELECT COUNT(*) FROM sqlite_master WHERE name = 'search_courses_update'") == 1
+    assert count('SELECT COUNT(*) FROM search_index') == len(courses) + 4
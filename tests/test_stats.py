@@ -0,0 +1,15 @@
+from app.extension import db
+from app.models import EnrollmentModel
+from app.stats import stats
+
+
+def test_stats_count_an_enrollment_whose_status_is_null(client, courses):
+    db.session.execute(db.update(EnrollmentModel).where(EnrollmentModel.id == 1).values(status=None))
+    db.session.commit()
+    stats.refresh()
+
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['enrollments'] == {'total': 3, 'by_status': {'enrolled': 3}}
+    assert data['active_enrollments_by_course'][0]['active'] == 3
@@ -0,0 +1,59 @@
+from app.balances import rebuild as rebuild_balances
+from app.extension import db
+from app.models import CourseModel, FeeModel, FeeBalanceModel, StudentModel, TeacherModel
+from app.workloads import rebuild as rebuild_workloads
+
+
+def balances():
+    return {(b.student_id, b.semester): (b.fee_count, b.billed, b.paid, b.pending)
+            for b in db.session.scalars(db.select(FeeBalanceModel))}
+
+
+def workloads():
+    db.session.expire_all()
+    return {t.id: (t.course_count, t.credits) for t in db.session.scalars(db.select(TeacherModel))}
+
+
+def test_balances_follow_flushes_and_bulk_statements(app, courses):
+    student = db.session.scalars(db.select(StudentModel)).first()
+    fee = FeeModel(student_id=student.id, amount=100.0, fee_type='tuition', semester='2025-1')
+    db.session.add(fee)
+    db.session.commit()
+    assert balances() == {(student.id, '2025-1'): (1, 100.0, 0.0, 100.0)}
+
+    fee.status = 'paid'
+    db.session.commit()
+    assert balances() == {(student.id, '2025-1'): (1, 100.0, 100.0, 0.0)}
+
+    db.session.execute(db.insert(FeeModel), [
+        {'student_id': student.id, 'amount': 50.0, 'fee_type': 'lab', 'semester': '2025-1'}])
+    db.session.execute(db.update(FeeModel).where(FeeModel.fee_type == 'lab').values(amount=60.0))
+    db.session.commit()
+    expected = {(student.id, '2025-1'): (2, 160.0, 100.0, 60.0)}
+    assert balances() == expected
+
+    db.session.delete(fee)
+    db.session.commit()
+    assert balances() == {(student.id, '2025-1'): (1, 60.0, 0.0, 60.0)}
+    assert rebuild_balances(db.session.connection()) == 1
+    assert balances() == {(student.id, '2025-1'): (1, 60.0, 0.0, 60.0)}
+
+
+def test_workloads_follow_flushes_and_bulk_statements(app, courses):
+    teacher = courses[0].teacher_id
+    assert workloads() == {teacher: (20, 60)}
+
+    other = TeacherModel(first_name='Grace', last_name='Hopper', email='grace@example.com')
+    db.session.add(other)
+    db.session.flush()
+    courses[1].teacher_id = other.id
+    courses[1].credits = 5
+    db.session.commit()
+    assert workloads() == {teacher: (19, 57), other.id: (1, 5)}
+
+    db.session.execute(db.insert(CourseModel), [
+        {'code': 'X1', 'name': 'Extra', 'credits': 2, 'teacher_id': other.id}])
+    db.session.execute(db.update(CourseModel).where(CourseModel.code == 'C02').values(teacher_id=other.id))
+    db.session.commit()
+    assert workloads() == {teacher: (18, 54), other.id: (3, 10)}
+    assert rebuild_workloads(db.session.connection()) == 0
@@ -0,0 +1,13 @@
+from app.extension import db
+from app.models import EnrollmentModel
+
+
+def test_transcript_counts_an_enrollment_whose_status_is_null(client, courses):
+    enrollment = db.session.get(EnrollmentModel, 1)
+    response = client.patch(f'/api/enrollments/{enrollment.id}', json={
+        'student_id': enrollment.student_id, 'course_id': enrollment.course_id, 'status': None})
+    assert response.status_code == 200
+
+    transcript = client.get(f'/api/students/{enrollment.student_id}/transcript').get_json()
+    assert transcript['credits_attempted'] == 3
+    assert transcript['semesters'][0]['courses'][0]['status'] == 'enrolled'
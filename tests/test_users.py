@@ -0,0 +1,21 @@
+import pytest
+
+from app.passwords import passwords
+
+
+@pytest.fixture
+def saturated(app):
+    """Every slot of the password pool taken."""
+    taken = 0
+    while passwords._slots.acquire(blocking=False):
+        taken += 1
+    yield
+    for _ in range(taken):
+        passwords._slots.release()
+
+
+def test_signup_returns_503_when_the_password_pool_is_saturated(client, saturated):
+    response = client.post('/api/users', json={'username': 'ada', 'email': 'ada@example.com', 'password': 'secret'})
+    assert response.status_code == 503
+    login = client.post('/api/login', json={'username': 'ada', 'password': 'secret'})
+    assert login.status_code == 503